@@ -129,6 +129,8 @@ def setup_logger(log_path = None):
 
 @click.option("--export-synthesis", type=click.Path(), default=None,
     help="base filename to output synthesis result")
+@click.option("--export-synthesis-png", is_flag=True, default=False,
+    help="decision tree synthesis: if set, exported trees are also rendered to PNG")
 
 @click.option("--mdp-discard-unreachable-choices", is_flag=True, default=False,
     help="if set, unreachable choices will be discarded from the splitting scheduler")
@@ -139,6 +141,8 @@ def setup_logger(log_path = None):
     help="decision tree synthesis: if set, all trees of size at most tree_depth will be enumerated")
 @click.option("--tree-map-scheduler", type=click.Path(), default=None,
     help="decision tree synthesis: path to a scheduler to be mapped to a decision tree")
+@click.option("--subtree-timeout-per-node", type=float, default=None,
+    help="decision tree synthesis: if set, a subtree gets this many seconds per decision node it replaces (between 2 and 60 s) instead of a fixed 60 s")
 @click.option("--add-dont-care-action", is_flag=True, default=False,
     help="decision tree synthesis: # if set, an explicit action executing a random choice of an available action will be added to each state")
 @click.option("--stop-on-first-improvement", is_flag=True, default=False,
@@ -168,6 +172,8 @@ def setup_logger(log_path = None):
     help="Seconds between periodic progress updates; set to 0 to disable.")
 @click.option("--progress-metadata", type=str,
     help="Comma-separated key=value pairs to include with every progress row.")
+@click.option("--progress-batch-size", type=int, default=32, show_default=True,
+    help="Number of periodic progress rows buffered before they are written; other rows are written immediately.")
 
 def paynt_run(
     project, sketch, props, relative_error, optimum_threshold, precision, exact, timeout,
@@ -179,9 +185,9 @@ def paynt_run(
     fsc_synthesis, fsc_memory_size, posterior_aware,
     storm_pomdp, iterative_storm, get_storm_result, storm_options, prune_storm,
     use_storm_cutoffs, unfold_strategy_storm,
-    export_synthesis,
+    export_synthesis, export_synthesis_png,
     mdp_discard_unreachable_choices,
-    tree_depth, tree_enumeration, tree_map_scheduler, add_dont_care_action,
+    tree_depth, tree_enumeration, tree_map_scheduler, subtree_timeout_per_node, add_dont_care_action,
     stop_on_first_improvement,
     dt_reduction,
     constraint_bound,
@@ -190,7 +196,8 @@ def paynt_run(
     profiling,
     progress_log,
     progress_interval,
-    progress_metadata
+    progress_metadata,
+    progress_batch_size
 ):
 
     profiler = None
@@ -226,6 +233,7 @@ def paynt_run(
     # set CLI parameters
     paynt.quotient.quotient.Quotient.disable_expected_visits = disable_expected_visits
     paynt.synthesizer.synthesizer.Synthesizer.export_synthesis_filename_base = export_synthesis
+    paynt.synthesizer.synthesizer.Synthesizer.export_png = export_synthesis_png
     paynt.synthesizer.synthesizer_cegis.SynthesizerCEGIS.conflict_generator_type = ce_generator
     paynt.quotient.pomdp.PomdpQuotient.initial_memory_size = fsc_memory_size
     paynt.quotient.pomdp.PomdpQuotient.posterior_aware = posterior_aware
@@ -237,6 +245,7 @@ def paynt_run(
     paynt.synthesizer.decision_tree.SynthesizerDecisionTree.tree_depth = tree_depth
     paynt.synthesizer.decision_tree.SynthesizerDecisionTree.tree_enumeration = tree_enumeration
     paynt.synthesizer.decision_tree.SynthesizerDecisionTree.scheduler_path = tree_map_scheduler
+    paynt.synthesizer.decision_tree.SynthesizerDecisionTree.subtree_timeout_per_node = subtree_timeout_per_node
     paynt.quotient.mdp.MdpQuotient.add_dont_care_action = add_dont_care_action
 
     paynt.synthesizer.synthesizer_ar.SynthesizerAR.configure_heuristic(
@@ -278,7 +287,7 @@ def paynt_run(
         for key in progress_metadata_dict.keys():
             if key not in fieldnames:
                 fieldnames.append(key)
-        progress_writer = CsvProgressLogger(progress_log, fieldnames)
+        progress_writer = CsvProgressLogger(progress_log, fieldnames, batch_size=max(1, progress_batch_size))
 
         def _progress_callback(row):
             progress_writer.write_row(row)
@@ -291,6 +300,8 @@ def paynt_run(
     else:
         synthesizer.set_progress_observer(None)
     synthesizer.run(optimum_threshold)
+    if progress_log:
+        progress_writer.close()
 
     if profiling:
         profiler.disable()
@@ -16,6 +16,10 @@ logger = logging.getLogger(__name__)
 
 class PrismParser:
 
+    # hole definition in a sketch, e.g. 'hole int x in {1,2,3};'
+    hole_re_brace = re.compile(r'^\s*hole\s+(.*?)\s+(.*?)\s+in\s+\{(.*?)\}\s*;')
+    # hole_re_bracket = re.compile(r'^\s*hole\s+(.*?)\s+(.*?)\s+in\s+[(.*?)]\s+;')
+
     @classmethod
     def read_prism(cls, sketch_path, properties_path, relative_error, use_exact=False):
 
@@ -70,12 +74,10 @@ class PrismParser:
             sketch_lines = f.readlines()
 
         # replace hole definitions with constants
-        hole_re_brace = re.compile(r'^\s*hole\s+(.*?)\s+(.*?)\s+in\s+\{(.*?)\}\s*;')
-        # hole_re_bracket = re.compile(r'^\s*hole\s+(.*?)\s+(.*?)\s+in\s+[(.*?)]\s+;')
         sketch_output = []
         hole_definitions = []
         for line in sketch_lines:
-            match = hole_re_brace.search(line)
+            match = cls.hole_re_brace.search(line)
             if match is None:
                 sketch_output.append(line)
                 continue
@@ -2,6 +2,7 @@ import paynt.quotient.quotient
 
 import stormpy
 import payntbind
+import collections
 import json
 import graphviz
 
@@ -10,6 +11,8 @@ logger = logging.getLogger(__name__)
 
 class Variable:
 
+    __slots__ = ("name", "domain")
+
     def __init__(self, name, domain):
         self.name = name
         self.domain = domain
@@ -53,11 +56,15 @@ class Variable:
 
 class DecisionTreeNode:
 
+    # trees are rebuilt many times during subtree synthesis, slots keep the nodes small
+    __slots__ = ("parent", "child_true", "child_false", "identifier", "old_identifier", "holes", "action", "variable", "variable_bound")
+
     def __init__(self, parent):
         self.parent = parent
         self.child_true = None
         self.child_false = None
         self.identifier = None
+        self.old_identifier = None
         self.holes = None
 
         self.action = None
@@ -81,74 +88,121 @@ class DecisionTreeNode:
         self.child_true = DecisionTreeNode(self)
         self.child_false = DecisionTreeNode(self)
 
-    def set_node_from_helper(self, tree_helper_node, variable_names, variable_domains, action_labels):
+    def set_node_from_helper(self, tree_helper_node, variable_index, value_index, action_index):
+        '''
+        :param variable_index maps variable names to variable indices
+        :param value_index for each variable, maps domain values to their indices
+        :param action_index maps action labels to action indices
+        '''
         if tree_helper_node["leaf"]:
-            self.action = action_labels.index(tree_helper_node["chosen"][0])
+            self.action = action_index[tree_helper_node["chosen"][0]]
         else:
-            self.variable = variable_names.index(tree_helper_node["chosen"][0])
+            self.variable = variable_index[tree_helper_node["chosen"][0]]
             # dtControl uses values that are not necessarily in the domain, e.g. let's say our domain is [0,2,3]
             # and we want to split [0] and [2,3], dtControl can choose 0,5 or 1,5. We expect it will be 0 in this case.
-            while tree_helper_node["chosen"][1] not in variable_domains[self.variable]:
+            while tree_helper_node["chosen"][1] not in value_index[self.variable]:
                 tree_helper_node["chosen"] = (tree_helper_node["chosen"][0], tree_helper_node["chosen"][1]-1)
-            self.variable_bound = variable_domains[self.variable].index(tree_helper_node["chosen"][1])
+            self.variable_bound = value_index[self.variable][tree_helper_node["chosen"][1]]
 
-    def add_children_from_helper(self, tree_helper, helper_node, variable_names, variable_domains, action_labels):
+    def add_children_from_helper(self, tree_helper, helper_node, variable_index, value_index, action_index):
         assert self.is_terminal
         self.child_true = DecisionTreeNode(self)
         true_child_helper = tree_helper[helper_node["children"][0]]
-        self.child_true.set_node_from_helper(true_child_helper, variable_names, variable_domains, action_labels)
+        self.child_true.set_node_from_helper(true_child_helper, variable_index, value_index, action_index)
         self.child_false = DecisionTreeNode(self)
         false_child_helper = tree_helper[helper_node["children"][1]]
-        self.child_false.set_node_from_helper(false_child_helper, variable_names, variable_domains, action_labels)
+        self.child_false.set_node_from_helper(false_child_helper, variable_index, value_index, action_index)
 
     def get_depth(self):
-        if self.is_terminal:
-            return 0
-        return 1 + max([child.get_depth() for child in self.child_nodes])
+        depth = 0
+        node_stack = [(self,0)]
+        while node_stack:
+            node,node_depth = node_stack.pop()
+            if node.is_terminal:
+                depth = max(depth,node_depth)
+                continue
+            node_stack.append((node.child_true,node_depth+1))
+            node_stack.append((node.child_false,node_depth+1))
+        return depth
     
+    def get_depth_and_nonterminals(self):
+        ''' Depth and number of non-terminal nodes of the subtree rooted in this node, computed in a single pass. '''
+        depth = 0
+        num_nonterminals = 0
+        node_stack = [(self,0)]
+        while node_stack:
+            node,node_depth = node_stack.pop()
+            if node.is_terminal:
+                depth = max(depth,node_depth)
+                continue
+            num_nonterminals += 1
+            node_stack.append((node.child_true,node_depth+1))
+            node_stack.append((node.child_false,node_depth+1))
+        return depth, num_nonterminals
+
     def get_number_of_descendants(self):
-        if self.is_terminal:
-            return 0
-        return 1 + sum([child.get_number_of_descendants() for child in self.child_nodes])
+        ''' Number of non-terminal nodes in the subtree rooted in this node. '''
+        num_nonterminals = 0
+        node_stack = [self]
+        while node_stack:
+            node = node_stack.pop()
+            if node.is_terminal:
+                continue
+            num_nonterminals += 1
+            node_stack.append(node.child_true)
+            node_stack.append(node.child_false)
+        return num_nonterminals
 
     def assign_identifiers(self, identifier=0, keep_old=False):
-        if keep_old:
-            self.old_identifier = self.identifier
-        self.identifier = identifier
-        if self.is_terminal:
-            return self.identifier
-        identifier = self.child_true.assign_identifiers(identifier+1, keep_old=keep_old)
-        identifier = self.child_false.assign_identifiers(identifier+1, keep_old=keep_old)
-        return identifier
+        '''
+        Assign identifiers in DFS pre-order (true child first) starting from the given identifier.
+        :returns the last identifier assigned
+        '''
+        node_stack = [self]
+        while node_stack:
+            node = node_stack.pop()
+            if keep_old:
+                node.old_identifier = node.identifier
+            node.identifier = identifier
+            identifier += 1
+            if not node.is_terminal:
+                node_stack.append(node.child_false)
+                node_stack.append(node.child_true)
+        return identifier-1
 
     def associate_holes(self, node_hole_info):
-        self.holes = [hole for hole,_,_ in node_hole_info[self.identifier]]
-        if self.is_terminal:
-            return
-        self.child_true.associate_holes(node_hole_info)
-        self.child_false.associate_holes(node_hole_info)
+        node_stack = [self]
+        while node_stack:
+            node = node_stack.pop()
+            node.holes = [hole for hole,_,_ in node_hole_info[node.identifier]]
+            if not node.is_terminal:
+                node_stack.append(node.child_true)
+                node_stack.append(node.child_false)
 
     def associate_assignment(self, assignment):
-        hole_assignment = [assignment.hole_options(hole)[0] for hole in self.holes]
-        if self.is_terminal:
-            self.action = hole_assignment[0]
-            return
-
-        self.variable = hole_assignment[0]
-        self.variable_bound = hole_assignment[self.variable+1]
-
-        self.child_true.associate_assignment(assignment)
-        self.child_false.associate_assignment(assignment)
+        node_stack = [self]
+        while node_stack:
+            node = node_stack.pop()
+            hole_assignment = [assignment.hole_options(hole)[0] for hole in node.holes]
+            if node.is_terminal:
+                node.action = hole_assignment[0]
+                continue
+            node.variable = hole_assignment[0]
+            node.variable_bound = hole_assignment[node.variable+1]
+            node_stack.append(node.child_true)
+            node_stack.append(node.child_false)
 
     def apply_hint(self, subfamily, tree_hint):
-        if self.is_terminal or tree_hint.is_terminal:
-            return
-
-        variable_hint = tree_hint.variable
-        subfamily.hole_set_options(self.holes[0],[variable_hint])
-        subfamily.hole_set_options(self.holes[variable_hint+1],[tree_hint.variable_bound])
-        self.child_true.apply_hint(subfamily,tree_hint.child_true)
-        self.child_false.apply_hint(subfamily,tree_hint.child_false)
+        node_stack = [(self,tree_hint)]
+        while node_stack:
+            node,node_hint = node_stack.pop()
+            if node.is_terminal or node_hint.is_terminal:
+                continue
+            variable_hint = node_hint.variable
+            subfamily.hole_set_options(node.holes[0],[variable_hint])
+            subfamily.hole_set_options(node.holes[variable_hint+1],[node_hint.variable_bound])
+            node_stack.append((node.child_true,node_hint.child_true))
+            node_stack.append((node.child_false,node_hint.child_false))
 
     def simplify(self, variables, state_valuations):
         if self.is_terminal:
@@ -186,101 +240,124 @@ class DecisionTreeNode:
             return f"{var.name}>{var.domain[self.variable_bound]}"
 
     def path_expression(self, variables):
-        if self.parent is None:
-            return []
-        return self.parent.path_expression(variables) + [self.parent.branch_expression(variables,true_branch=self.is_true_child)]
+        expressions = []
+        node = self
+        while node.parent is not None:
+            expressions.append(node.parent.branch_expression(variables,true_branch=node.is_true_child))
+            node = node.parent
+        expressions.reverse()
+        return expressions
     
     def copy(self, parent):
-        node_copy = DecisionTreeNode(parent)
-        node_copy.identifier = self.identifier
-        node_copy.holes = self.holes
-        if self.is_terminal:
-            node_copy.action = self.action
-        else:
-            node_copy.variable = self.variable
-            node_copy.variable_bound = self.variable_bound
-            node_copy.child_true = self.child_true.copy(node_copy)
-            node_copy.child_false = self.child_false.copy(node_copy)
-        return node_copy
+        root_copy = DecisionTreeNode(parent)
+        node_stack = [(self,root_copy)]
+        while node_stack:
+            node,node_copy = node_stack.pop()
+            node_copy.identifier = node.identifier
+            node_copy.holes = node.holes
+            if node.is_terminal:
+                node_copy.action = node.action
+                continue
+            node_copy.variable = node.variable
+            node_copy.variable_bound = node.variable_bound
+            node_copy.child_true = DecisionTreeNode(node_copy)
+            node_copy.child_false = DecisionTreeNode(node_copy)
+            node_stack.append((node.child_true,node_copy.child_true))
+            node_stack.append((node.child_false,node_copy.child_false))
+        return root_copy
 
     def to_string(self, variables, action_labels, indent_level=0, indent_size=2):
-        indent = " "*indent_level*indent_size
-        if self.is_terminal:
-            return indent + f"{action_labels[self.action]}" + "\n"
-        s = ""
-        s += indent + f"if {self.branch_expression(variables)}:" + "\n"
-        s += self.child_true.to_string(variables,action_labels,indent_level+1)
-        s += indent + f"else:" + "\n"
-        s += self.child_false.to_string(variables,action_labels,indent_level+1)
-        return s
+        lines = []
+        # stack entries are (node,indent level); node None stands for the else-line of the parent
+        node_stack = [(self,indent_level)]
+        while node_stack:
+            node,level = node_stack.pop()
+            indent = " "*level*indent_size
+            if node is None:
+                lines.append(indent + "else:\n")
+            elif node.is_terminal:
+                lines.append(indent + f"{action_labels[node.action]}\n")
+            else:
+                lines.append(indent + f"if {node.branch_expression(variables)}:\n")
+                node_stack.append((node.child_false,level+1))
+                node_stack.append((None,level))
+                node_stack.append((node.child_true,level+1))
+        return "".join(lines)
 
     @property
     def graphviz_id(self):
         return str(self.identifier)
 
     def to_graphviz(self, graphviz_tree, variables, action_labels, highlight_nodes=[]):
-        if not self.is_terminal:
-            for child in self.child_nodes:
-                child.to_graphviz(graphviz_tree,variables,action_labels,highlight_nodes)
+        highlight_nodes = set(highlight_nodes)
+        # post-order (true subtree, false subtree, node); stack entries are (node,children already added)
+        node_stack = [(self,False)]
+        while node_stack:
+            node,children_added = node_stack.pop()
+            if not node.is_terminal and not children_added:
+                node_stack.append((node,True))
+                node_stack.append((node.child_false,False))
+                node_stack.append((node.child_true,False))
+                continue
 
-        if self.is_terminal:
-            node_label = action_labels[self.action]
-        else:
-            var = variables[self.variable]
-            node_label = f"{var.name}<={var.domain[self.variable_bound]}"
-        
-        if self.identifier in highlight_nodes:
-            graphviz_tree.node(self.graphviz_id, label=node_label, shape="box", style="filled", fillcolor="lightgreen", margin="0.05,0.05")
-        else:
-            graphviz_tree.node(self.graphviz_id, label=node_label, shape="box", style="rounded", margin="0.05,0.05")
-        if not self.is_terminal:
-            graphviz_tree.edge(self.graphviz_id,self.child_true.graphviz_id,label="T")
-            graphviz_tree.edge(self.graphviz_id,self.child_false.graphviz_id,label="F")
+            if node.is_terminal:
+                node_label = action_labels[node.action]
+            else:
+                var = variables[node.variable]
+                node_label = f"{var.name}<={var.domain[node.variable_bound]}"
+
+            if node.identifier in highlight_nodes:
+                graphviz_tree.node(node.graphviz_id, label=node_label, shape="box", style="filled", fillcolor="lightgreen", margin="0.05,0.05")
+            else:
+                graphviz_tree.node(node.graphviz_id, label=node_label, shape="box", style="rounded", margin="0.05,0.05")
+            if not node.is_terminal:
+                graphviz_tree.edge(node.graphviz_id,node.child_true.graphviz_id,label="T")
+                graphviz_tree.edge(node.graphviz_id,node.child_false.graphviz_id,label="F")
 
     def get_action_for_state(self, quotient, state, state_valuation, nci):
-        if self.is_terminal:
-            action_index = self.action
+        node = self
+        while not node.is_terminal:
+            bound = quotient.variables[node.variable].domain[node.variable_bound]
+            node = node.child_true if state_valuation[node.variable] <= bound else node.child_false
+        action_index = node.action
+        index = 0
+        for choice in range(nci[state],nci[state+1]):
+            if quotient.choice_to_action[choice] == action_index:
+                return index
+            index += 1
+        else:
+            # TODO as far as I know this happens only because of unreachable states not being included in the tree
+            # for now we will treat this by using the __random__ action but it can lead to strange behaviour
             index = 0
             for choice in range(nci[state],nci[state+1]):
-                if quotient.choice_to_action[choice] == action_index:
+                if quotient.action_labels[quotient.choice_to_action[choice]] == "__random__":
                     return index
                 index += 1
-            else:
-                # TODO as far as I know this happens only because of unreachable states not being included in the tree
-                # for now we will treat this by using the __random__ action but it can lead to strange behaviour
-                index = 0
-                for choice in range(nci[state],nci[state+1]):
-                    if quotient.action_labels[quotient.choice_to_action[choice]] == "__random__":
-                        return index
-                    index += 1
-                assert False
-        var = quotient.variables[self.variable]
-        bound = var.domain[self.variable_bound]
-        if state_valuation[self.variable] <= bound:
-            return self.child_true.get_action_for_state(quotient, state, state_valuation, nci)
-        else:
-            return self.child_false.get_action_for_state(quotient, state, state_valuation, nci)
+            assert False
         
     # after subtree synthesis the tree nodes contain identifiers to objects from subtree_quotient
     # this needs to be fixed to match the objects in the original quotient
     def fix_with_respect_to_quotient(self, quotient, new_quotient):
-        if self.is_terminal:
-            old_index = self.action
-            self.action = new_quotient.action_labels.index(quotient.action_labels[old_index])
-            return
-        
-        var = quotient.variables[self.variable]
-        var_name = var.name
-        var_bound = var.domain[self.variable_bound]
-        for var_id, new_var in enumerate(new_quotient.variables):
-            if new_var.name == var_name:
-                break
-        bound_id = new_var.domain.index(var_bound)
-        self.variable = var_id
-        self.variable_bound = bound_id
+        node_stack = [self]
+        while node_stack:
+            node = node_stack.pop()
+            if node.is_terminal:
+                old_index = node.action
+                node.action = new_quotient.action_labels.index(quotient.action_labels[old_index])
+                continue
+
+            var = quotient.variables[node.variable]
+            var_name = var.name
+            var_bound = var.domain[node.variable_bound]
+            for var_id, new_var in enumerate(new_quotient.variables):
+                if new_var.name == var_name:
+                    break
+            bound_id = new_var.domain.index(var_bound)
+            node.variable = var_id
+            node.variable_bound = bound_id
 
-        self.child_true.fix_with_respect_to_quotient(quotient, new_quotient)
-        self.child_false.fix_with_respect_to_quotient(quotient, new_quotient)
+            node_stack.append(node.child_true)
+            node_stack.append(node.child_false)
 
 
 
@@ -312,18 +389,22 @@ class DecisionTree:
 
     def get_depth(self):
         return self.root.get_depth()
+
+    def get_depth_and_nonterminals(self):
+        return self.root.get_depth_and_nonterminals()
     
     def build_from_tree_helper(self, tree_helper):
         self.reset()
         node_stack = [(0, self.root)]
-        var_names = [v.name for v in self.variables]
-        var_domains = [v.domain for v in self.variables]
-        self.root.set_node_from_helper(tree_helper[0], var_names, var_domains, self.quotient.action_labels)
+        variable_index = {v.name : index for index,v in enumerate(self.variables)}
+        value_index = [{value : index for index,value in enumerate(v.domain)} for v in self.variables]
+        action_index = {label : index for index,label in enumerate(self.quotient.action_labels)}
+        self.root.set_node_from_helper(tree_helper[0], variable_index, value_index, action_index)
         while node_stack:
             node_id, node = node_stack.pop()
             if tree_helper[node_id]["leaf"]:
                 continue
-            node.add_children_from_helper(tree_helper, tree_helper[node_id], var_names, var_domains, self.quotient.action_labels)
+            node.add_children_from_helper(tree_helper, tree_helper[node_id], variable_index, value_index, action_index)
             node_stack.append((tree_helper[node_id]["children"][0], node.child_true))
             node_stack.append((tree_helper[node_id]["children"][1], node.child_false))
 
@@ -339,21 +420,44 @@ class DecisionTree:
     def collect_nodes(self, node_condition=None):
         if node_condition is None:
             node_condition = lambda node : True
-        node_queue = [self.root]
+        node_queue = collections.deque([self.root])
         output_nodes = []
         while node_queue:
-            node = node_queue.pop(0)
+            node = node_queue.popleft()
             if node_condition(node):
                 output_nodes.append(node)
-            node_queue += node.child_nodes
+            if not node.is_terminal:
+                node_queue.append(node.child_true)
+                node_queue.append(node.child_false)
         return output_nodes
 
+    def get_subtree_statistics(self):
+        '''
+        Compute the depth and the number of non-terminal nodes of the subtree rooted in every node, in a single pass.
+        :returns nodes in BFS order, dictionary of subtree depths, dictionary of subtree non-terminal counts
+        '''
+        nodes = self.collect_nodes()
+        subtree_depth = {}
+        subtree_nonterminals = {}
+        # in reversed BFS order, children are visited before their parents
+        for node in reversed(nodes):
+            if node.is_terminal:
+                subtree_depth[node] = 0
+                subtree_nonterminals[node] = 0
+            else:
+                subtree_depth[node] = 1 + max(subtree_depth[node.child_true], subtree_depth[node.child_false])
+                subtree_nonterminals[node] = 1 + subtree_nonterminals[node.child_true] + subtree_nonterminals[node.child_false]
+        return nodes, subtree_depth, subtree_nonterminals
+
     def collect_terminals(self):
         return self.collect_nodes(lambda node : node.is_terminal)
 
     def collect_nonterminals(self):
         return self.collect_nodes(lambda node : not node.is_terminal)
 
+    def count_nonterminals(self):
+        return self.root.get_number_of_descendants()
+
     def to_list(self):
         num_nodes = len(self.collect_nodes())
         node_info = [ None for node in range(num_nodes) ]
@@ -366,26 +470,32 @@ class DecisionTree:
 
     def simplify(self, state_valuations):
         self.root.simplify(self.variables, state_valuations)
+        # values cached for the installed tree helper tree no longer describe the simplified tree
+        if self.quotient.tree_helper_tree is self:
+            self.quotient.reset_tree_helper_tree_caches()
 
     def to_string(self):
         return self.root.to_string(self.variables,self.quotient.action_labels)
 
     def to_prism(self, indent_size=2):
         indent = " "*indent_size
-        s = ""
-        s += "module scheduler\n"
-        for terminal in self.collect_terminals():
-            action = f"{self.quotient.action_labels[terminal.action]}"
-            guard = " & ".join(terminal.path_expression(self.variables))
+        lines = ["module scheduler"]
+        # BFS in which every node inherits the branch expressions of its parent, terminals are visited in the same
+        # order as in collect_terminals()
+        node_queue = collections.deque([(self.root,())])
+        while node_queue:
+            node,path = node_queue.popleft()
+            if not node.is_terminal:
+                node_queue.append((node.child_true, path + (node.branch_expression(self.variables,true_branch=True),)))
+                node_queue.append((node.child_false, path + (node.branch_expression(self.variables,true_branch=False),)))
+                continue
+            action = f"{self.quotient.action_labels[node.action]}"
+            guard = " & ".join(path)
             if guard == "":
                 guard = "true"
-            s += f"{indent}[{action}] {guard} -> true;\n"
-        # s += indent + f"if {var.name}<={var.domain[self.variable_bound]}:" + "\n"
-        # s += self.child_true.to_string(variables,action_labels,indent_level+1)
-        # s += indent + f"else:" + "\n"
-        # s += self.child_false.to_string(variables,action_labels,indent_level+1)
-        s += "endmodule\n"
-        return s
+            lines.append(f"{indent}[{action}] {guard} -> true;")
+        lines.append("endmodule")
+        return "\n".join(lines) + "\n"
 
     def to_graphviz(self, highlight_nodes=[]):
         logging.getLogger("graphviz").setLevel(logging.WARNING)
@@ -409,30 +519,20 @@ class DecisionTree:
             scheduler_choice = stormpy.storage.SchedulerChoice(action_index)
             scheduler.set_choice(scheduler_choice, state)
             
-        json_scheduler_full = json.loads(scheduler.to_json_str(self.quotient.quotient_mdp, skip_dont_care_states=True))
-        # json_final = []
-        # for entry in json_scheduler_full:
-        #     if entry["c"] == "undefined":
-        #         # TODO remove this eventually (keeping it for testing), the fix above makes this unnecessary
-        #         assert False
-        #         continue
-        #     json_final.append(entry)
-
-        json_str = json.dumps(json_scheduler_full, indent=4)
-        return json_str
+        # dtControl only parses the scheduler, so the JSON produced by Storm is passed on as is
+        return scheduler.to_json_str(self.quotient.quotient_mdp, skip_dont_care_states=True)
 
     
     def append_tree_as_subtree(self, new_subtree, subtree_root_node_id, subtree_quotient):
-        subtree_root_node = self.collect_nodes(lambda node : node.identifier == subtree_root_node_id)
-        assert len(subtree_root_node) == 1, f"subtree root node id {subtree_root_node_id} not found in decision tree"
-        subtree_root_node = subtree_root_node[0]
-
         all_current_nodes = self.collect_nodes()
+        subtree_root_node = next((node for node in all_current_nodes if node.identifier == subtree_root_node_id), None)
+        assert subtree_root_node is not None, f"subtree root node id {subtree_root_node_id} not found in decision tree"
+
         new_subtree.root.assign_identifiers(identifier=len(all_current_nodes)+1)
         new_subtree.root.fix_with_respect_to_quotient(subtree_quotient, self.quotient)
 
         parent = subtree_root_node.parent
-        if parent.child_true.identifier == subtree_root_node.identifier:
+        if parent.child_true is subtree_root_node:
             parent.child_true = new_subtree.root
         else:
             parent.child_false = new_subtree.root
@@ -494,7 +594,7 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
             self.state_is_relevant = [relevant and state_has_actions[state] for state,relevant in enumerate(self.state_is_relevant)]
         self.state_is_relevant_bv = stormpy.BitVector(mdp.nr_states)
         [self.state_is_relevant_bv.set(state,value) for state,value in enumerate(self.state_is_relevant)]
-        logger.debug(f"MDP has {self.state_is_relevant_bv.number_of_set_bits()}/{self.state_is_relevant_bv.size()} relevant states")
+        logger.debug("MDP has %d/%d relevant states", self.state_is_relevant_bv.number_of_set_bits(), self.state_is_relevant_bv.size())
 
         action_labels,_ = payntbind.synthesis.extractActionLabels(mdp)
         if MdpQuotient.DONT_CARE_ACTION_LABEL not in action_labels and MdpQuotient.add_dont_care_action:
@@ -529,10 +629,31 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
 
         self.variables = [Variable.create_variable(variable,name,variable_domain[variable]) for variable,name in enumerate(variable_name)]
         self.relevant_state_valuations = state_valuations
-        logger.debug(f"found the following {len(self.variables)} variables: {[str(v) for v in self.variables]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("found the following %d variables: %s", len(self.variables), [str(v) for v in self.variables])
 
         self.tree_helper = tree_helper
+        # action selected by the tree helper tree in each relevant state, see get_tree_helper_tree_actions
+        self.tree_helper_tree_actions = None
+        # node of the tree helper tree with each identifier, see get_tree_helper_tree_node
+        self.tree_helper_tree_nodes = None
+        # decision tree built from the tree helper, see build_tree_helper_tree
+        self.tree_helper_tree = None
+
 
+    @property
+    def tree_helper_tree(self):
+        return self._tree_helper_tree
+
+    @tree_helper_tree.setter
+    def tree_helper_tree(self, tree):
+        self._tree_helper_tree = tree
+        self.reset_tree_helper_tree_caches()
+
+    def reset_tree_helper_tree_caches(self):
+        ''' Drop the values computed from the tree helper tree, needed whenever the tree is replaced or modified. '''
+        self.tree_helper_tree_actions = None
+        self.tree_helper_tree_nodes = None
 
     def get_variable_id(self, var):
         for id, variable in enumerate(self.variables):
@@ -591,7 +712,7 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
         return states
     
     def get_state_space_for_tree_helper_node_old(self, node_id):
-        node = self.tree_helper_tree.collect_nodes(lambda node : node.identifier == node_id)[0]
+        node = self.get_tree_helper_tree_node(node_id)
         current_node = node
         states = set(range(self.quotient_mdp.nr_states))
         while current_node.parent is not None:
@@ -604,7 +725,7 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
         return list(states)
     
     def get_state_space_for_tree_helper_node(self, node_id):
-        node = self.tree_helper_tree.collect_nodes(lambda node : node.identifier == node_id)[0]
+        node = self.get_tree_helper_tree_node(node_id)
         current_node = node
         states = stormpy.storage.BitVector(self.quotient_mdp.nr_states, True)
         while current_node.parent is not None:
@@ -658,16 +779,47 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
                 current_node = current_node.child_false
         return self.action_labels[current_node.action]
     
+    def get_tree_helper_tree_node(self, node_id):
+        '''
+        The node of the tree helper tree with the given identifier. The mapping is cached until the tree is replaced or
+        simplified, see reset_tree_helper_tree_caches.
+        '''
+        if self.tree_helper_tree_nodes is None:
+            self.tree_helper_tree_nodes = {node.identifier : node for node in self.tree_helper_tree.collect_nodes()}
+        return self.tree_helper_tree_nodes[node_id]
+
+    def get_tree_helper_tree_actions(self):
+        '''
+        For each relevant state, the index of the action selected by the tree helper tree (None for irrelevant states).
+        The evaluation is cached until the tree is replaced or simplified, see reset_tree_helper_tree_caches.
+        '''
+        if self.tree_helper_tree_actions is not None:
+            return self.tree_helper_tree_actions
+        tree = self.tree_helper_tree
+        state_to_action = [None] * self.quotient_mdp.nr_states
+        for state in self.state_is_relevant_bv:
+            state_valuation = self.relevant_state_valuations[state]
+            current_node = tree.root
+            while not current_node.is_terminal:
+                bound = self.variables[current_node.variable].domain[current_node.variable_bound]
+                if state_valuation[current_node.variable] <= bound:
+                    current_node = current_node.child_true
+                else:
+                    current_node = current_node.child_false
+            state_to_action[state] = current_node.action
+        self.tree_helper_tree_actions = state_to_action
+        return state_to_action
+
     def get_selected_choices_from_tree_helper(self, state_to_exclude):
         selected_choices = stormpy.storage.BitVector(self.quotient_mdp.nr_choices, False)
         mdp_nci = self.quotient_mdp.nondeterministic_choice_indices.copy()
+        state_to_action = self.get_tree_helper_tree_actions()
         for state in range(self.quotient_mdp.nr_states):
             if state_to_exclude.get(state) or self.state_is_relevant_bv.get(state) == False:
                 for choice in range(mdp_nci[state],mdp_nci[state+1]):
                     selected_choices.set(choice, True)
                 continue
-            chosen_action_label = self.get_chosen_action_for_state_from_tree_helper(state)
-            action_index = self.action_labels.index(chosen_action_label)
+            action_index = state_to_action[state]
             for choice in range(mdp_nci[state],mdp_nci[state+1]):
                 if self.choice_to_action[choice] == action_index:
                     selected_choices.set(choice, True)
@@ -680,7 +832,7 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
                         selected_choices.set(choice, True)
                         break
                 continue
-                assert False, f"no choice for state {state} even though action {chosen_action_label} was chosen"
+                assert False, f"no choice for state {state} even though action {self.action_labels[action_index]} was chosen"
 
         # TODO another implementation, both suck!
         # selected_choices = stormpy.storage.BitVector(self.quotient_mdp.nr_choices, True)
@@ -822,7 +974,7 @@ class MdpQuotient(paynt.quotient.quotient.Quotient):
         '''
         Rebuild the decision tree template, the design space and the coloring.
         '''
-        logger.debug(f"building tree of depth {depth}")
+        logger.debug("building tree of depth %d", depth)
 
         num_actions = len(self.action_labels)
         dont_care_action = num_actions
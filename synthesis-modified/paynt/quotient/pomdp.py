@@ -18,6 +18,8 @@ class PomdpQuotient(paynt.quotient.quotient.Quotient):
 
     # implicit size for POMDP unfolding
     initial_memory_size = 1
+    # matches hole names created by create_hole_name
+    hole_name_re = re.compile(r"([A|M])\((.*?),(\d+)\)")
     # if True, posterior-aware unfolding will be applied
     posterior_aware = False
 
@@ -153,7 +155,7 @@ class PomdpQuotient(paynt.quotient.quotient.Quotient):
 
 
     def decode_hole_name(self, name):
-        result = re.search(r"([A|M])\((.*?),(\d+)\)", name)
+        result = self.hole_name_re.search(name)
         is_action_hole = result.group(1) == "A"
         observation_label = result.group(2)
         memory = int(result.group(3))
@@ -1,24 +1,22 @@
 import paynt.synthesizer.synthesizer_ar
 import paynt.quotient.mdp
+import paynt.models.models
 import paynt.utils.timer
-
-from paynt.utils.tree_helper import parse_tree_helper
-
+import paynt.utils.progress_logger
 import paynt.utils.tree_helper
+
 import stormpy
 import payntbind
+import graphviz
 
 import os
 import json
-
-import os
-import shutil
 import subprocess
+import tempfile
 import signal
 import atexit
 
 import logging
-from datetime import datetime
 logger = logging.getLogger(__name__)
 
 class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
@@ -29,11 +27,15 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
     tree_enumeration = False
     # path to a scheduler to be mapped to a decision tree
     scheduler_path = None
-
+    # if set, the time for synthesizing a subtree is this many seconds per decision node of the replaced subtree
+    # (between 2 s and the fixed subtree timeout) instead of the fixed subtree timeout
+    subtree_timeout_per_node = None
     def __init__(self, *args):
         super().__init__(*args)
         self.best_tree = None
         self.best_tree_value = None
+        # directory of the last export, known to exist
+        self.export_directory = None
         self._setup_tree_export_handlers()
 
     @property
@@ -60,6 +62,8 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         def signal_handler(signum, frame):
             logger.info(f"Received signal {signum}, attempting to export tree...")
             export_tree_on_exit()
+            # the default handler below does not run atexit, so buffered progress rows are written here
+            paynt.utils.progress_logger.flush_open_loggers()
             # Re-raise to allow normal signal handling
             signal.signal(signum, signal.SIG_DFL)
             os.kill(os.getpid(), signum)
@@ -164,12 +168,11 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         logger.info(f"EXPORT: tree_filename = '{tree_filename}'")
         
         directory = os.path.dirname(tree_filename)
-        if directory:
+        if directory and directory != self.export_directory:
             os.makedirs(directory, exist_ok=True)
-        with open(tree_filename, 'w') as file:
-            file.write(tree.source)
-            file.flush()
-            os.fsync(file.fileno())
+            self.export_directory = directory
+        # the tree is also exported from the exit and signal handlers, so an interrupted export must not truncate the file
+        self.write_file_atomically(tree_filename, tree.source)
         logger.info(f"exported decision tree to {tree_filename}")
         
         # Debug: verify file exists and get absolute path
@@ -180,6 +183,9 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         else:
             logger.error(f"ERROR: {tree_filename} does NOT exist after write!")
 
+        if not self.export_png:
+            return
+
         tree_visualization_filename = export_filename_base + ".png"
         tree.render(export_filename_base, format="png", cleanup=True) # using export_filename_base since graphviz appends .png by default
         # Ensure PNG file is synced to disk
@@ -198,37 +204,40 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         # this also defines the priority in case of a tie, therefore: current > paynt > dtcontrol > recomputed
         # nodes = {"current": len(current_tree.collect_nonterminals()), "paynt": len(paynt_tree.collect_nonterminals()), "dtcontrol": len(dtcontrol_tree.collect_nonterminals()) if dtcontrol_tree is not None else None, "recomputed": len(recomputed_scheduler_tree.collect_nonterminals()) if recomputed_scheduler_tree is not None else None}
         # nodes = {"current": (len(current_tree.collect_nonterminals()), current_tree.get_depth()), "recomputed": (len(recomputed_scheduler_tree.collect_nonterminals()), recomputed_scheduler_tree.get_depth()) if recomputed_scheduler_tree is not None else None, "dtcontrol": (len(dtcontrol_tree.collect_nonterminals()), dtcontrol_tree.get_depth()) if dtcontrol_tree is not None else None, "paynt": (len(paynt_tree.collect_nonterminals()), paynt_tree.get_depth())}
-        current_nodes = len(current_tree.collect_nonterminals())
-        nodes = {"current": [current_nodes, current_tree.get_depth(), 1]}
+        current_depth, current_nodes = current_tree.get_depth_and_nonterminals()
+        nodes = {"current": [current_nodes, current_depth, 1]}
         for setting, dtcontrol_tree in recomputed_scheduler_trees.items():
-            nodes["recomputed-"+setting] = [len(dtcontrol_tree[1].collect_nonterminals()), dtcontrol_tree[1].get_depth(), 1]
+            depth, num_nodes = dtcontrol_tree[1].get_depth_and_nonterminals()
+            nodes["recomputed-"+setting] = [num_nodes, depth, 1]
         for setting, dtcontrol_tree in dtcontrol_trees.items():
-            nodes["dtcontrol-"+setting] = [len(dtcontrol_tree[1].collect_nonterminals()), dtcontrol_tree[1].get_depth(), 1]
-        nodes["paynt"] = [len(paynt_tree.collect_nonterminals()), paynt_tree.get_depth(), 1]
+            depth, num_nodes = dtcontrol_tree[1].get_depth_and_nonterminals()
+            nodes["dtcontrol-"+setting] = [num_nodes, depth, 1]
+        depth, num_nodes = paynt_tree.get_depth_and_nonterminals()
+        nodes["paynt"] = [num_nodes, depth, 1]
         nodes = {k: v for k, v in nodes.items() if v is not None}
-        sorted_nodes = sorted(nodes.items(), key=lambda item: item[1][1])
         sorted_nodes = sorted(nodes.items(), key=lambda item: item[1][0])
         # TODO experimental sort by value
         # sorted_nodes = sorted(nodes.items(), key=lambda item: item[1][2])
 
-        print(sorted_nodes)
+        logger.debug("candidate trees (nonterminals, depth, value): %s", sorted_nodes)
         return sorted_nodes[0][0]
     
 
     def create_tree_node_queue_heuristic(self, helper_tree, desired_depth=6, nodes_to_skip=[], use_states_for_node_priority=False):
-        nodes = helper_tree.collect_nodes(lambda node : node.get_depth() == desired_depth)
+        nodes, subtree_depth, subtree_nonterminals = helper_tree.get_subtree_statistics()
+        nodes = [node for node in nodes if subtree_depth[node] == desired_depth]
         if nodes is None or len(nodes) == 0:
             return []
-        helper_nodes = [self.quotient.tree_helper[node.identifier] for node in nodes]
+        nodes_to_skip = set(nodes_to_skip)
         helper_node_stats = []
-        for helper_node in helper_nodes:
+        for helper_tree_node in nodes:
+            helper_node = self.quotient.tree_helper[helper_tree_node.identifier]
             if helper_node["id"] == 0 or helper_node["id"] in nodes_to_skip:
                 continue
-            helper_tree_node = helper_tree.collect_nodes(lambda node : node.identifier == helper_node["id"])[0]
             if use_states_for_node_priority:
-                stats = {"id": helper_node["id"], "states": self.quotient.get_state_space_for_tree_helper_node(helper_node["id"]), "nodes": helper_tree_node.get_number_of_descendants()}
+                stats = {"id": helper_node["id"], "states": self.quotient.get_state_space_for_tree_helper_node(helper_node["id"]), "nodes": subtree_nonterminals[helper_tree_node]}
             else:
-                stats = {"id": helper_node["id"], "nodes": helper_tree_node.get_number_of_descendants()}
+                stats = {"id": helper_node["id"], "nodes": subtree_nonterminals[helper_tree_node]}
 
             # this happens for nodes created outside of DtControl
             if "evaluations" not in helper_node.keys():
@@ -243,14 +252,75 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         if len(helper_node_stats) == 0:
             return []
 
-        helper_node_stats = sorted(helper_node_stats, key=lambda x : x["nodes"], reverse=True)
-        helper_node_stats = sorted(helper_node_stats, key=lambda x : len(x["predicates"]), reverse=True)
+        # prefer more near-optimal predicates, then larger subtrees
         if use_states_for_node_priority:
-            helper_node_stats = sorted(helper_node_stats, key=lambda x : x["states"].number_of_set_bits()/x["nodes"])
+            helper_node_stats.sort(key=lambda x : (x["states"].number_of_set_bits()/x["nodes"], -len(x["predicates"]), -x["nodes"]))
+        else:
+            helper_node_stats.sort(key=lambda x : (-len(x["predicates"]), -x["nodes"]))
 
         return helper_node_stats
     
 
+    def run_dtcontrol(self, work_dir, scheduler_json, dtcontrol_settings):
+        '''
+        Run dtcontrol on the given scheduler once for every setting, the runs are concurrent and each uses its own
+        subdirectory of the given working directory.
+        :returns a dictionary mapping each setting to a pair (tree helper, tree helper tree)
+        '''
+        # the user config is looked up relative to the directory PAYNT is run from
+        dtcontrol_config = os.path.abspath(os.path.join("prerequisites", "dtcontrol", "user-config.yml"))
+        # dtcontrol progress output is only of interest when debugging, errors still go to stderr
+        dtcontrol_stdout = None if logger.isEnabledFor(logging.DEBUG) else subprocess.DEVNULL
+
+        # the settings are independent, so dtcontrol is started for all of them before waiting for any
+        dtcontrol_processes = {}
+        tree_paths = {}
+        completed = False
+        try:
+            for setting in dtcontrol_settings:
+                # every setting runs in its own directory, so that concurrent runs do not share any output files
+                setting_dir = os.path.join(work_dir, setting)
+                os.makedirs(setting_dir, exist_ok=True)
+                with open(os.path.join(setting_dir, "scheduler.storm.json"), "w") as file:
+                    file.write(scheduler_json)
+                # the working directory is reused, make sure a tree left over from a previous call is never parsed
+                tree_path = os.path.join(setting_dir, "decision_trees", setting, "scheduler", f"{setting}.json")
+                if os.path.exists(tree_path):
+                    os.remove(tree_path)
+                tree_paths[setting] = tree_path
+                if setting == "default":
+                    command = ["dtcontrol", "--input", "scheduler.storm.json", "-r", "--use-preset", "default"]
+                else:
+                    command = ["dtcontrol", "--input", "scheduler.storm.json", "-r", "--use-preset", setting, "--config", dtcontrol_config]
+                dtcontrol_processes[setting] = subprocess.Popen(command, cwd=setting_dir, stdout=dtcontrol_stdout)
+            for process in dtcontrol_processes.values():
+                process.wait()
+            completed = True
+        finally:
+            # if starting or waiting on a run failed, do not leave the other runs behind
+            if not completed:
+                for process in dtcontrol_processes.values():
+                    if process.poll() is None:
+                        process.kill()
+                    process.wait()
+
+        for setting, process in dtcontrol_processes.items():
+            if process.returncode != 0:
+                raise RuntimeError(f"dtcontrol failed for setting {setting} with exit code {process.returncode}")
+
+        dtcontrol_trees = {}
+        for setting in dtcontrol_settings:
+            logger.info(f"parsing new dtcontrol tree for setting {setting}")
+            dtcontrol_tree_helper = paynt.utils.tree_helper.parse_tree_helper(tree_paths[setting])
+            dtcontrol_tree_helper_tree = self.quotient.build_tree_helper_tree(dtcontrol_tree_helper)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('new dtcontrol tree (%s) has depth %d and %d nodes', setting, *dtcontrol_tree_helper_tree.get_depth_and_nonterminals())
+
+            dtcontrol_trees[setting] = (dtcontrol_tree_helper, dtcontrol_tree_helper_tree)
+
+        return dtcontrol_trees
+
+
     def synthesize_subtrees(self, opt_result_value, random_result_value=None):
 
         # SETTINGS
@@ -258,6 +328,7 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         max_iter = 1000
         epsilon = 0.01
         timeout = 3600
+        subtree_timeout = 60 # time for synthesizing a single subtree, see also subtree_timeout_per_node
         depth_fine_tuning = True # decreases sub-tree depth once all subtrees of the current depth have been explored
         break_on_small_tree = True # PAYNT synthesis ends when a implementable tree with good enough value if found
         use_dtcontrol = False
@@ -278,237 +349,210 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
             eps_optimum_threshold = opt_result_value - epsilon * opt_random_diff
         self.synthesis_timer = paynt.utils.timer.Timer(timeout)
         self.synthesis_timer.start()
-
-        # initialize from external tree
-        self.quotient.tree_helper_tree = self.quotient.build_tree_helper_tree()
-        tree_helper_tree = self.quotient.tree_helper_tree
-        logger.info(f'initial external tree has depth {tree_helper_tree.get_depth()} and {len(tree_helper_tree.collect_nonterminals())} nodes')
+        # dtcontrol runs share one working directory, removed once subtree synthesis is over
+        dtcontrol_work_dir = tempfile.TemporaryDirectory(prefix="dtcontrol_") if use_dtcontrol else None
+
+        try:
+            # initialize from external tree
+            self.quotient.tree_helper_tree = self.quotient.build_tree_helper_tree()
+            tree_helper_tree = self.quotient.tree_helper_tree
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('initial external tree has depth %d and %d nodes', *tree_helper_tree.get_depth_and_nonterminals())
         
-        current_iter = 0
-        current_depth = subtree_depth
-        # current_value = opt_result_value
+            current_iter = 0
+            current_depth = subtree_depth
+            # current_value = opt_result_value
 
-        # TODO think about this fine tuning more...
-        while (depth_fine_tuning and current_depth > 1) or (current_depth == subtree_depth):
+            # TODO think about this fine tuning more...
+            while (depth_fine_tuning and current_depth > 1) or (current_depth == subtree_depth):
 
-            if self.synthesis_timer.time_limit_reached():
-                    logger.info(f"timeout reached")
-                    break
+                if self.synthesis_timer.time_limit_reached():
+                        logger.info(f"timeout reached")
+                        break
 
-            logger.info(f"starting iteration with subtree depth {current_depth}")
-            # TODO this is not guaranteed to work in subsequent iterations when the PAYNT tree is used
-            node_queue = self.create_tree_node_queue_heuristic(tree_helper_tree, desired_depth=current_depth, use_states_for_node_priority=use_states_for_node_priority)
-            nodes_to_skip = [] # this will include nodes that were already processed
+                logger.info(f"starting iteration with subtree depth {current_depth}")
+                # TODO this is not guaranteed to work in subsequent iterations when the PAYNT tree is used
+                node_queue = self.create_tree_node_queue_heuristic(tree_helper_tree, desired_depth=current_depth, use_states_for_node_priority=use_states_for_node_priority)
+                nodes_to_skip = [] # this will include nodes that were already processed
 
-            while len(node_queue) > 0 and (True or (current_iter < max_iter)):
+                while len(node_queue) > 0 and (True or (current_iter < max_iter)):
 
-                if self.synthesis_timer.time_limit_reached():
-                    logger.info(f"timeout reached")
-                    break
+                    if self.synthesis_timer.time_limit_reached():
+                        logger.info(f"timeout reached")
+                        break
 
-                logger.info(f"starting iteration {current_iter} with {len(node_queue)} nodes in node queue")
-                logger.info(f"current tree size: {len(tree_helper_tree.collect_nodes())} nodes")
+                    logger.info(f"starting iteration {current_iter} with {len(node_queue)} nodes in node queue")
+                    if logger.isEnabledFor(logging.INFO):
+                        # every non-terminal node has exactly two children
+                        logger.info("current tree size: %d nodes", 2 * tree_helper_tree.count_nonterminals() + 1)
             
-                current_iter += 1
-                node = node_queue.pop(0)
+                    current_iter += 1
+                    node = node_queue.pop(0)
 
-                # print(tree_helper_tree.to_graphviz([node["id"]]))
+                    # print(tree_helper_tree.to_graphviz([node["id"]]))
 
-                # subtree synthesis
-                if use_states_for_node_priority:
-                    node_states = node["states"]
-                else:
-                    node_states = self.quotient.get_state_space_for_tree_helper_node(node["id"])
-                submdp = self.quotient.get_submdp_from_unfixed_states(node_states)
-                logger.info(f"subtree quotient has {submdp.model.nr_states} states and {submdp.model.nr_choices} choices")
-                subtree_spec = self.quotient.specification.copy()
-                subtree_quotient = paynt.quotient.mdp.MdpQuotient(submdp.model, subtree_spec)
-                # if subtree_quotient.self.state_is_relevant_bv.number_of_set_bits() == 0:
-                #     logger.info(f"no relevant states in subtree quotient")
-                #     continue
-                subtree_quotient.specification.optimality.update_optimum(eps_optimum_threshold)
-                subtree_synthesizer = SynthesizerDecisionTree(subtree_quotient)
-                self.paynt_calls += 1
+                    # subtree synthesis
+                    if use_states_for_node_priority:
+                        node_states = node["states"]
+                    else:
+                        node_states = self.quotient.get_state_space_for_tree_helper_node(node["id"])
+                    submdp = self.quotient.get_submdp_from_unfixed_states(node_states)
+                    logger.info(f"subtree quotient has {submdp.model.nr_states} states and {submdp.model.nr_choices} choices")
+                    subtree_spec = self.quotient.specification.copy()
+                    subtree_quotient = paynt.quotient.mdp.MdpQuotient(submdp.model, subtree_spec)
+                    # if subtree_quotient.self.state_is_relevant_bv.number_of_set_bits() == 0:
+                    #     logger.info(f"no relevant states in subtree quotient")
+                    #     continue
+                    subtree_quotient.specification.optimality.update_optimum(eps_optimum_threshold)
+                    subtree_synthesizer = SynthesizerDecisionTree(subtree_quotient)
+                    self.paynt_calls += 1
                 
-                if subtree_quotient.state_is_relevant_bv.number_of_set_bits() == 0:
-                    random_tree = subtree_quotient.create_uniform_random_tree()
-                    subtree_synthesizer.best_tree = random_tree
-                else:
-                    subtree_synthesizer.synthesize_tree_sequence(opt_result_value, overall_timeout=60, max_depth=current_depth, break_if_found=break_on_small_tree)
-
-                # create new tree
-                if subtree_synthesizer.best_tree is not None:
-                    logger.info(f"admissible subtree found from node {node['id']}")
-                    self.paynt_tree_found += 1
-                    relevant_state_valuations = [subtree_quotient.relevant_state_valuations[state] for state in subtree_quotient.state_is_relevant_bv]
-                    subtree_synthesizer.best_tree.simplify(relevant_state_valuations)
-                    paynt_subtree_helper_tree_copy = tree_helper_tree.copy()
-                    paynt_subtree_helper_tree_copy.append_tree_as_subtree(subtree_synthesizer.best_tree, node["id"], subtree_quotient)
-                    paynt_subtree_helper_tree_copy.root.assign_identifiers(keep_old=True)
-                    logger.info(f'new tree has depth {paynt_subtree_helper_tree_copy.get_depth()} and {len(paynt_subtree_helper_tree_copy.collect_nonterminals())} nodes')
-
-                    self.quotient.tree_helper_tree = paynt_subtree_helper_tree_copy
-
-                    new_dtcontrol_tree_helper_tree = None
-                    recomputed_scheduler_tree_helper_tree = None
-                    dtcontrol_trees = {}
-                    recomputed_dtcontrol_trees = {}
-
-                    # paynt_subtree_value = subtree_synthesizer.best_tree_value
-
-                    if use_dtcontrol:
-                        submdp_for_tree = self.quotient.get_submdp_from_unfixed_states()
-                        # double check
-                        # res = submdp.check_specification(self.quotient.specification)
-                        # print(res)
-                        # TODO debugging the value getting below eps_optimum_threshold
-                        # if opt_result_value < eps_optimum_threshold:
-                        #     assert res.optimality_result.value <= eps_optimum_threshold, f"optimum value {res.optimality_result.value} is not below threshold {eps_optimum_threshold}"
-                        # else:
-                        #     assert res.optimality_result.value >= eps_optimum_threshold, f"optimum value {res.optimality_result.value} is not above threshold {eps_optimum_threshold}"
-                        reachable_states = stormpy.BitVector(self.quotient.quotient_mdp.nr_states, False)
-                        for state in range(submdp_for_tree.model.nr_states):
-                            reachable_states.set(submdp_for_tree.quotient_state_map[state], True)
-
-                    if use_dtcontrol and recompute_scheduler:
-                        submpd_outside_of_subtree = self.quotient.get_submdp_from_unfixed_states(~node_states)
-                        oos_result = submpd_outside_of_subtree.check_specification(self.quotient.specification)
-
-                        # recompute_scheduler_value = oos_result.optimality_result.result.at(0)
-
-                        recomputed_scheduler = payntbind.synthesis.create_scheduler(self.quotient.quotient_mdp.nr_states)
-                        quotient_mdp_nci = self.quotient.quotient_mdp.nondeterministic_choice_indices.copy()
-                        new_scheduler = oos_result.optimality_result.result.scheduler
-                        state_to_choice = self.quotient.scheduler_to_state_to_choice(submpd_outside_of_subtree, new_scheduler)
-                        for state in range(self.quotient.quotient_mdp.nr_states):
-                            quotient_choice = state_to_choice[state]
-                            if quotient_choice is None or not self.quotient.state_is_relevant_bv.get(state):
-                                payntbind.synthesis.set_dont_care_state_for_scheduler(recomputed_scheduler, state, 0, False)
-                                index = 0
-                            else:
-                                index = quotient_choice - quotient_mdp_nci[state]
-                            scheduler_choice = stormpy.storage.SchedulerChoice(index)
-                            recomputed_scheduler.set_choice(scheduler_choice, state)
-
-                        recomputed_json_scheduler_full = json.loads(recomputed_scheduler.to_json_str(self.quotient.quotient_mdp, skip_dont_care_states=True))
-                        recomputed_json_str = json.dumps(recomputed_json_scheduler_full, indent=4)
-
-                    # calling dtcontrol
-                    if use_dtcontrol:
-                        timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-                        temp_file_name = "subtree_test" + timestamp
-                        os.makedirs(temp_file_name, exist_ok=True)
-                        open(f"{temp_file_name}/scheduler.storm.json", "w").write(paynt_subtree_helper_tree_copy.to_scheduler_json(reachable_states))
-
-                        for setting in dtcontrol_settings:
-                            self.dtcontrol_calls += 1
-
-                            if setting == "default":
-                                command = ["dtcontrol", "--input", "scheduler.storm.json", "-r", "--use-preset", "default"]
-                            else:
-                                command = ["dtcontrol", "--input", "scheduler.storm.json", "-r", "--use-preset", setting, "--config", "../prerequisites/dtcontrol/user-config.yml"]
-                            subprocess.run(command, cwd=f"{temp_file_name}")
-
-                            logger.info(f"parsing new dtcontrol tree for setting {setting}")
-                            new_dtcontrol_tree_helper = paynt.utils.tree_helper.parse_tree_helper(f"{temp_file_name}/decision_trees/{setting}/scheduler/{setting}.json")
-                            new_dtcontrol_tree_helper_tree = self.quotient.build_tree_helper_tree(new_dtcontrol_tree_helper)
-                            logger.info(f'new dtcontrol tree ({setting}) has depth {new_dtcontrol_tree_helper_tree.get_depth()} and {len(new_dtcontrol_tree_helper_tree.collect_nonterminals())} nodes')
-
-                            dtcontrol_trees[setting] = (new_dtcontrol_tree_helper, new_dtcontrol_tree_helper_tree)
-
-                        shutil.rmtree(f"{temp_file_name}")
-
-                        if recompute_scheduler:
-                            timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-                            temp_file_name = "subtree_test" + timestamp
-                            os.makedirs(temp_file_name, exist_ok=True)
-                            open(f"{temp_file_name}/scheduler.storm.json", "w").write(recomputed_json_str)
-
-                            for setting in dtcontrol_settings:
-                                self.dtcontrol_recomputed_calls += 1
-
-                                if setting == "default":
-                                    command = ["dtcontrol", "--input", "scheduler.storm.json", "-r", "--use-preset", "default"]
+                    if subtree_quotient.state_is_relevant_bv.number_of_set_bits() == 0:
+                        random_tree = subtree_quotient.create_uniform_random_tree()
+                        subtree_synthesizer.best_tree = random_tree
+                    else:
+                        if self.subtree_timeout_per_node is None:
+                            node_timeout = subtree_timeout
+                        else:
+                            remaining_time = timeout - self.synthesis_timer.read()
+                            node_timeout = min(subtree_timeout, max(2, self.subtree_timeout_per_node*node["nodes"]), remaining_time)
+                        subtree_synthesizer.synthesize_tree_sequence(opt_result_value, overall_timeout=node_timeout, max_depth=current_depth, break_if_found=break_on_small_tree)
+
+                    # create new tree
+                    if subtree_synthesizer.best_tree is not None:
+                        logger.info(f"admissible subtree found from node {node['id']}")
+                        self.paynt_tree_found += 1
+                        relevant_state_valuations = [subtree_quotient.relevant_state_valuations[state] for state in subtree_quotient.state_is_relevant_bv]
+                        subtree_synthesizer.best_tree.simplify(relevant_state_valuations)
+                        paynt_subtree_helper_tree_copy = tree_helper_tree.copy()
+                        paynt_subtree_helper_tree_copy.append_tree_as_subtree(subtree_synthesizer.best_tree, node["id"], subtree_quotient)
+                        paynt_subtree_helper_tree_copy.root.assign_identifiers(keep_old=True)
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info('new tree has depth %d and %d nodes', *paynt_subtree_helper_tree_copy.get_depth_and_nonterminals())
+
+                        self.quotient.tree_helper_tree = paynt_subtree_helper_tree_copy
+
+                        new_dtcontrol_tree_helper_tree = None
+                        recomputed_scheduler_tree_helper_tree = None
+                        dtcontrol_trees = {}
+                        recomputed_dtcontrol_trees = {}
+
+                        # paynt_subtree_value = subtree_synthesizer.best_tree_value
+
+                        if use_dtcontrol:
+                            submdp_for_tree = self.quotient.get_submdp_from_unfixed_states()
+                            # double check
+                            # res = submdp.check_specification(self.quotient.specification)
+                            # print(res)
+                            # TODO debugging the value getting below eps_optimum_threshold
+                            # if opt_result_value < eps_optimum_threshold:
+                            #     assert res.optimality_result.value <= eps_optimum_threshold, f"optimum value {res.optimality_result.value} is not below threshold {eps_optimum_threshold}"
+                            # else:
+                            #     assert res.optimality_result.value >= eps_optimum_threshold, f"optimum value {res.optimality_result.value} is not above threshold {eps_optimum_threshold}"
+                            reachable_states = stormpy.BitVector(self.quotient.quotient_mdp.nr_states, False)
+                            for state in range(submdp_for_tree.model.nr_states):
+                                reachable_states.set(submdp_for_tree.quotient_state_map[state], True)
+
+                        if use_dtcontrol and recompute_scheduler:
+                            submpd_outside_of_subtree = self.quotient.get_submdp_from_unfixed_states(~node_states)
+                            oos_result = submpd_outside_of_subtree.check_specification(self.quotient.specification)
+
+                            # recompute_scheduler_value = oos_result.optimality_result.result.at(0)
+
+                            recomputed_scheduler = payntbind.synthesis.create_scheduler(self.quotient.quotient_mdp.nr_states)
+                            quotient_mdp_nci = self.quotient.quotient_mdp.nondeterministic_choice_indices.copy()
+                            new_scheduler = oos_result.optimality_result.result.scheduler
+                            state_to_choice = self.quotient.scheduler_to_state_to_choice(submpd_outside_of_subtree, new_scheduler)
+                            for state in range(self.quotient.quotient_mdp.nr_states):
+                                quotient_choice = state_to_choice[state]
+                                if quotient_choice is None or not self.quotient.state_is_relevant_bv.get(state):
+                                    payntbind.synthesis.set_dont_care_state_for_scheduler(recomputed_scheduler, state, 0, False)
+                                    index = 0
                                 else:
-                                    command = ["dtcontrol", "--input", "scheduler.storm.json", "-r", "--use-preset", setting, "--config", "../prerequisites/dtcontrol/user-config.yml"]
-                                subprocess.run(command, cwd=f"{temp_file_name}")
-
-                                logger.info(f"parsing new dtcontrol tree for recomputed scheduler for setting {setting}")
-                                recomputed_scheduler_tree_helper = paynt.utils.tree_helper.parse_tree_helper(f"{temp_file_name}/decision_trees/{setting}/scheduler/{setting}.json")
-                                recomputed_scheduler_tree_helper_tree = self.quotient.build_tree_helper_tree(recomputed_scheduler_tree_helper)
-                                logger.info(f'new dtcontrol tree ({setting}) based on recomputed scheduler has depth {recomputed_scheduler_tree_helper_tree.get_depth()} and {len(recomputed_scheduler_tree_helper_tree.collect_nonterminals())} nodes')
-
-                                recomputed_dtcontrol_trees[setting] = (recomputed_scheduler_tree_helper, recomputed_scheduler_tree_helper_tree)
-
-                            shutil.rmtree(f"{temp_file_name}")
-
-                    # current_normalized_value = self.compute_normalized_value(current_value, opt_result_value, random_result_value)
-                    # paynt_subtree_normalized_value = self.compute_normalized_value(paynt_subtree_value, opt_result_value, random_result_value)
-                    # recompute_scheduler_normalized_value = self.compute_normalized_value(recompute_scheduler_value, opt_result_value, random_result_value)
-
-                    chosen_tree = self.choose_tree_to_use(tree_helper_tree, paynt_subtree_helper_tree_copy, dtcontrol_trees, recomputed_dtcontrol_trees)
-
-                    print(f"{chosen_tree} tree was chosen")
-                            
-                    # if False: # TODO remove this
-                    if chosen_tree == "current":
-                        logger.info(f"None of the new trees are smaller, continuing with current tree")
-                        # nodes_to_skip.append(node["id"])
-                        self.all_larger += 1
-                        self.quotient.tree_helper_tree = tree_helper_tree
-                    elif chosen_tree == "paynt":
-                        logger.info(f"New PAYNT tree is smallest")
-                        self.paynt_successes_smaller += 1
-                        tree_helper_tree = paynt_subtree_helper_tree_copy
-                        self.quotient.tree_helper_tree = tree_helper_tree
-                        for node in node_queue:
-                            nodes = self.quotient.tree_helper_tree.collect_nodes(lambda x : x.old_identifier == node["id"])
-                            assert len(nodes) == 1, f'only one node should have the old_identifier equal to {node["id"]}'
-                            new_node = nodes[0]
-                            node["id"] = new_node.identifier
-                        new_nodes = self.create_tree_node_queue_heuristic(tree_helper_tree, desired_depth=current_depth, nodes_to_skip=[node["id"] for node in node_queue], use_states_for_node_priority=use_states_for_node_priority)
-                        node_queue += new_nodes
-                        # current_value = paynt_subtree_value
-                        # new_nodes_to_skip = []
-                        # for node_skip_id in nodes_to_skip:
-                        #     nodes = self.quotient.tree_helper_tree.collect_nodes(lambda x : x.old_identifier == node_skip_id)
-                        #     if len(nodes) == 0:
-                        #         continue
-                        #     assert len(nodes) == 1, f'only one node should have the old_identifier equal to {node_skip_id}'
-                        #     new_node = nodes[0]
-                        #     new_nodes_to_skip.append(new_node.identifier)
-                        # nodes_to_skip = new_nodes_to_skip
-                    elif use_dtcontrol and chosen_tree.startswith("dtcontrol"):
-                        logger.info(f"New DtControl tree ({chosen_tree}) is smallest")
-                        dtcontrol_setting = chosen_tree.split("-")[1]
-                        new_dtcontrol_tree_helper = dtcontrol_trees[dtcontrol_setting][0]
-                        new_dtcontrol_tree_helper_tree = dtcontrol_trees[dtcontrol_setting][1]
-                        self.dtcontrol_successes += 1
-                        self.quotient.tree_helper = new_dtcontrol_tree_helper
-                        self.quotient.tree_helper_tree = new_dtcontrol_tree_helper_tree
-                        tree_helper_tree = new_dtcontrol_tree_helper_tree
-                        node_queue = self.create_tree_node_queue_heuristic(tree_helper_tree, use_states_for_node_priority=use_states_for_node_priority)
-                        # current_value = paynt_subtree_value
-                        # nodes_to_skip = []
-                    elif use_dtcontrol and recompute_scheduler and chosen_tree.startswith("recomputed"):
-                        logger.info(f"New DtControl tree ({chosen_tree}) for recomputed scheduler is smallest")
-                        dtcontrol_setting = chosen_tree.split("-")[1]
-                        recomputed_scheduler_tree_helper = recomputed_dtcontrol_trees[dtcontrol_setting][0]
-                        recomputed_scheduler_tree_helper_tree = recomputed_dtcontrol_trees[dtcontrol_setting][1]
-                        self.dtcontrol_recomputed_successes += 1
-                        self.quotient.tree_helper = recomputed_scheduler_tree_helper
-                        self.quotient.tree_helper_tree = recomputed_scheduler_tree_helper_tree
-                        tree_helper_tree = recomputed_scheduler_tree_helper_tree
-                        node_queue = self.create_tree_node_queue_heuristic(tree_helper_tree, use_states_for_node_priority=use_states_for_node_priority)
-                        # current_value = recompute_scheduler_value
-                        # nodes_to_skip = []
+                                    index = quotient_choice - quotient_mdp_nci[state]
+                                scheduler_choice = stormpy.storage.SchedulerChoice(index)
+                                recomputed_scheduler.set_choice(scheduler_choice, state)
+
+                            recomputed_json_str = recomputed_scheduler.to_json_str(self.quotient.quotient_mdp, skip_dont_care_states=True)
+
+                        # calling dtcontrol
+                        if use_dtcontrol:
+                            self.dtcontrol_calls += len(dtcontrol_settings)
+                            dtcontrol_trees = self.run_dtcontrol(dtcontrol_work_dir.name, paynt_subtree_helper_tree_copy.to_scheduler_json(reachable_states), dtcontrol_settings)
+
+                            if recompute_scheduler:
+                                self.dtcontrol_recomputed_calls += len(dtcontrol_settings)
+                                recomputed_dtcontrol_trees = self.run_dtcontrol(dtcontrol_work_dir.name, recomputed_json_str, dtcontrol_settings)
+
+                        # current_normalized_value = self.compute_normalized_value(current_value, opt_result_value, random_result_value)
+                        # paynt_subtree_normalized_value = self.compute_normalized_value(paynt_subtree_value, opt_result_value, random_result_value)
+                        # recompute_scheduler_normalized_value = self.compute_normalized_value(recompute_scheduler_value, opt_result_value, random_result_value)
+
+                        chosen_tree = self.choose_tree_to_use(tree_helper_tree, paynt_subtree_helper_tree_copy, dtcontrol_trees, recomputed_dtcontrol_trees)
+
+                        # if False: # TODO remove this
+                        if chosen_tree == "current":
+                            logger.info(f"None of the new trees are smaller, continuing with current tree")
+                            # nodes_to_skip.append(node["id"])
+                            self.all_larger += 1
+                            self.quotient.tree_helper_tree = tree_helper_tree
+                        elif chosen_tree == "paynt":
+                            logger.info(f"New PAYNT tree is smallest")
+                            self.paynt_successes_smaller += 1
+                            tree_helper_tree = paynt_subtree_helper_tree_copy
+                            self.quotient.tree_helper_tree = tree_helper_tree
+                            # identifiers were reassigned after appending the subtree, old identifiers are unique
+                            old_identifier_to_node = {x.old_identifier : x for x in tree_helper_tree.collect_nodes()}
+                            for node in node_queue:
+                                assert node["id"] in old_identifier_to_node, f'no node has the old_identifier equal to {node["id"]}'
+                                node["id"] = old_identifier_to_node[node["id"]].identifier
+                            new_nodes = self.create_tree_node_queue_heuristic(tree_helper_tree, desired_depth=current_depth, nodes_to_skip=[node["id"] for node in node_queue], use_states_for_node_priority=use_states_for_node_priority)
+                            node_queue += new_nodes
+                            # current_value = paynt_subtree_value
+                            # new_nodes_to_skip = []
+                            # for node_skip_id in nodes_to_skip:
+                            #     nodes = self.quotient.tree_helper_tree.collect_nodes(lambda x : x.old_identifier == node_skip_id)
+                            #     if len(nodes) == 0:
+                            #         continue
+                            #     assert len(nodes) == 1, f'only one node should have the old_identifier equal to {node_skip_id}'
+                            #     new_node = nodes[0]
+                            #     new_nodes_to_skip.append(new_node.identifier)
+                            # nodes_to_skip = new_nodes_to_skip
+                        elif use_dtcontrol and chosen_tree.startswith("dtcontrol"):
+                            logger.info(f"New DtControl tree ({chosen_tree}) is smallest")
+                            dtcontrol_setting = chosen_tree.split("-")[1]
+                            new_dtcontrol_tree_helper = dtcontrol_trees[dtcontrol_setting][0]
+                            new_dtcontrol_tree_helper_tree = dtcontrol_trees[dtcontrol_setting][1]
+                            self.dtcontrol_successes += 1
+                            self.quotient.tree_helper = new_dtcontrol_tree_helper
+                            self.quotient.tree_helper_tree = new_dtcontrol_tree_helper_tree
+                            tree_helper_tree = new_dtcontrol_tree_helper_tree
+                            node_queue = self.create_tree_node_queue_heuristic(tree_helper_tree, use_states_for_node_priority=use_states_for_node_priority)
+                            # current_value = paynt_subtree_value
+                            # nodes_to_skip = []
+                        elif use_dtcontrol and recompute_scheduler and chosen_tree.startswith("recomputed"):
+                            logger.info(f"New DtControl tree ({chosen_tree}) for recomputed scheduler is smallest")
+                            dtcontrol_setting = chosen_tree.split("-")[1]
+                            recomputed_scheduler_tree_helper = recomputed_dtcontrol_trees[dtcontrol_setting][0]
+                            recomputed_scheduler_tree_helper_tree = recomputed_dtcontrol_trees[dtcontrol_setting][1]
+                            self.dtcontrol_recomputed_successes += 1
+                            self.quotient.tree_helper = recomputed_scheduler_tree_helper
+                            self.quotient.tree_helper_tree = recomputed_scheduler_tree_helper_tree
+                            tree_helper_tree = recomputed_scheduler_tree_helper_tree
+                            node_queue = self.create_tree_node_queue_heuristic(tree_helper_tree, use_states_for_node_priority=use_states_for_node_priority)
+                            # current_value = recompute_scheduler_value
+                            # nodes_to_skip = []
                     
-                    # exit()
-                else:
-                    logger.info(f"no admissible subtree found from node {node['id']}")
-                    # nodes_to_skip.append(node["id"])
+                        # exit()
+                    else:
+                        logger.info(f"no admissible subtree found from node {node['id']}")
+                        # nodes_to_skip.append(node["id"])
 
-            current_depth -= 1
+                current_depth -= 1
+        finally:
+            # also on an exception, e.g. a failed dtcontrol run, do not leave the removal to the garbage collector
+            if dtcontrol_work_dir is not None:
+                dtcontrol_work_dir.cleanup()
 
         self.quotient.tree_helper_tree = tree_helper_tree
         
@@ -523,10 +567,12 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
             logger.info(f"tree did not induce dtmc?")
         # assert dtmc.model.nr_states == dtmc.model.nr_choices, "tree did not induce dtmc"
         result = dtmc.check_specification(self.quotient.specification)
-        result_negate = dtmc.check_specification(self.quotient.specification.negate())
+        if logger.isEnabledFor(logging.DEBUG):
+            # a second full model check, only worth it when debugging
+            result_negate = dtmc.check_specification(self.quotient.specification.negate())
+            logger.debug(f"negated specification: {result_negate}")
 
         print(result)
-        print(result_negate)
         print()
 
         # TODO find out why this would not hold????
@@ -538,9 +584,10 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         self.best_tree = self.quotient.tree_helper_tree
         self.best_tree_value = result.optimality_result.value
 
-        logger.info(f'final tree has value {result.optimality_result.value} with depth {self.quotient.tree_helper_tree.get_depth()} and {len(self.quotient.tree_helper_tree.collect_nonterminals())} nodes')
+        final_depth, final_nodes = self.best_tree.get_depth_and_nonterminals()
+        logger.info(f'final tree has value {result.optimality_result.value} with depth {final_depth} and {final_nodes} nodes')
 
-        print(result.optimality_result.value, round(self.synthesis_timer.read(), 2), self.quotient.tree_helper_tree.get_depth(), len(self.quotient.tree_helper_tree.collect_nonterminals()))
+        print(result.optimality_result.value, round(self.synthesis_timer.read(), 2), final_depth, final_nodes)
 
         # exit()
 
@@ -712,8 +759,7 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
         else:
             relevant_state_valuations = [self.quotient.relevant_state_valuations[state] for state in self.quotient.state_is_relevant_bv]
             self.best_tree.simplify(relevant_state_valuations)
-            depth = self.best_tree.get_depth()
-            num_nodes = len(self.best_tree.collect_nonterminals())
+            depth, num_nodes = self.best_tree.get_depth_and_nonterminals()
             logger.info(f"synthesized tree of depth {depth} with {num_nodes} decision nodes")
             if self.quotient.specification.has_optimality:
                 logger.info(f"the synthesized tree has value {self.best_tree_value}")
@@ -742,7 +788,6 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
                 try:
                     if self.best_tree is None:
                         # Build a trivial single-node tree that chooses a default action (first available)
-                        from paynt.utils import tree_helper as _th
                         # Fallback: use quotient.decision_tree if it exists (partially constructed) else make minimal
                         fallback = None
                         if hasattr(self.quotient, 'decision_tree') and self.quotient.decision_tree is not None:
@@ -755,7 +800,6 @@ class SynthesizerDecisionTree(paynt.synthesizer.synthesizer_ar.SynthesizerAR):
                                 def __init__(self):
                                     self.children = []
                                 def to_graphviz(self):
-                                    import graphviz
                                     g = graphviz.Digraph()
                                     g.node("root", label="<no-tree>")
                                     return g
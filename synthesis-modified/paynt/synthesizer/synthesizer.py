@@ -5,6 +5,7 @@ from typing import Any, Callable, Dict, Optional
 
 import logging
 import math
+import os
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +22,21 @@ class Synthesizer:
 
     # base filename (i.e. without extension) to export synthesis result
     export_synthesis_filename_base = None
+    # if set, exported trees are also rendered to PNG (requires the graphviz binaries)
+    export_png = False
+
+    @staticmethod
+    def write_file_atomically(filename, content):
+        '''
+        Write content to a temporary file and rename it over filename, so that an interrupted write never
+        leaves a truncated file behind.
+        '''
+        filename_tmp = filename + ".tmp"
+        with open(filename_tmp, "w") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(filename_tmp, filename)
 
     @staticmethod
     def choose_synthesizer(quotient, method, fsc_synthesis=False, storm_control=None):
@@ -180,24 +196,37 @@ class Synthesizer:
         def _decision_tree_stats(tree_obj):
             if tree_obj is None:
                 return None
+            get_depth_and_nonterminals = getattr(tree_obj, "get_depth_and_nonterminals", None)
+            if get_depth_and_nonterminals is not None:
+                try:
+                    depth, nonterminals = get_depth_and_nonterminals()
+                except Exception:
+                    return None
+                # every non-terminal node of a decision tree has exactly two children
+                return 2 * nonterminals + 1, depth
             depth = None
             total_nodes = None
-            if hasattr(tree_obj, "get_depth"):
+            # look every method up once, a missing method is None
+            get_depth = getattr(tree_obj, "get_depth", None)
+            collect_nodes = getattr(tree_obj, "collect_nodes", None)
+            collect_nonterminals = getattr(tree_obj, "collect_nonterminals", None)
+            collect_terminals = getattr(tree_obj, "collect_terminals", None)
+            if get_depth is not None:
                 try:
-                    depth = tree_obj.get_depth()
+                    depth = get_depth()
                 except Exception:
                     depth = None
-            if hasattr(tree_obj, "collect_nodes"):
+            if collect_nodes is not None:
                 try:
-                    total_nodes = len(tree_obj.collect_nodes())
+                    total_nodes = len(collect_nodes())
                 except Exception:
                     total_nodes = None
-            elif hasattr(tree_obj, "collect_nonterminals"):
+            elif collect_nonterminals is not None:
                 try:
-                    internal = len(tree_obj.collect_nonterminals())
+                    internal = len(collect_nonterminals())
                     total_nodes = internal
-                    if hasattr(tree_obj, "collect_terminals"):
-                        total_nodes += len(tree_obj.collect_terminals())
+                    if collect_terminals is not None:
+                        total_nodes += len(collect_terminals())
                 except Exception:
                     total_nodes = None
             if total_nodes is None and depth is None:
@@ -218,12 +247,21 @@ class Synthesizer:
             return None, None
 
         try:
-            total_nodes = len(policy_tree.collect_all()) if hasattr(policy_tree, "collect_all") else None
-
-            def _compute_depth(node):
-                if node is None or getattr(node, "is_leaf", False):
-                    return 0
-                return 1 + max((_compute_depth(child) for child in node.child_nodes), default=0)
+            collect_all = getattr(policy_tree, "collect_all", None)
+            total_nodes = len(collect_all()) if collect_all is not None else None
+
+            # policy tree nodes always define is_leaf, so it is accessed directly
+            def _compute_depth(root):
+                depth = 0
+                node_stack = [] if root is None else [(root, 0)]
+                while node_stack:
+                    node, node_depth = node_stack.pop()
+                    if node.is_leaf:
+                        depth = max(depth, node_depth)
+                        continue
+                    depth = max(depth, node_depth + 1)
+                    node_stack.extend((child, node_depth + 1) for child in node.child_nodes)
+                return depth
 
             depth = _compute_depth(getattr(policy_tree, "root", None))
             return total_nodes, depth
@@ -381,14 +419,13 @@ class Synthesizer:
                 if best_tree is not None and hasattr(best_tree, "to_graphviz"):
                     tree = best_tree.to_graphviz()
                     # Ensure parent directory exists
-                    import os
                     parent = os.path.dirname(export_base)
                     if parent:
                         os.makedirs(parent, exist_ok=True)
-                    # Write .dot and render .png
-                    with open(export_base + ".dot", "w") as f:
-                        f.write(tree.source)
-                    tree.render(export_base, format="png", cleanup=True)
+                    # Write .dot and, if enabled, render .png
+                    self.write_file_atomically(export_base + ".dot", tree.source)
+                    if self.export_png:
+                        tree.render(export_base, format="png", cleanup=True)
         except Exception as e:
             logger.warning(f"Failed to export synthesis tree: {e}")
 
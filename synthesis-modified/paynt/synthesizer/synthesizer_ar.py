@@ -207,7 +207,7 @@ class SynthesizerAR(paynt.synthesizer.synthesizer.Synthesizer):
                 subfamily_priority = self._sanitize_priority(parent_priority)
                 heapq.heappush(families, (-subfamily_priority, counter, subfamily))
                 counter += 1
-                logger.debug(f"  Added subfamily with priority {subfamily_priority}")
+                logger.debug("  Added subfamily with priority %s", subfamily_priority)
 
             self._note_frontier_size(len(families))
                 
@@ -1,14 +1,15 @@
 import re
 import pygraphviz as pgv
 
+HOLE_NAME_RE = re.compile(r"[AM]\(\[.*\],\d\)")
+HOLE_NAME_OBSERVATION_RE = re.compile(r"[MA]\(\[o=\d\],\d\)")
+
 def parse_hole(name) -> object:
-    assert re.match(r"[AM]\(\[.*\],\d\)",
-                    name), "Cannot use restrict function, hole name doesn't match"
+    assert HOLE_NAME_RE.match(name), "Cannot use restrict function, hole name doesn't match"
     hole = {}
     hole["type"] = "Memory" if name[0] == "M" else "Assignment"
     hole["memory"] = int(name[-2])
-    hole["observation"] = int(name[5]) if re.match(
-        r"[MA]\(\[o=\d\],\d\)", name) else 0
+    hole["observation"] = int(name[5]) if HOLE_NAME_OBSERVATION_RE.match(name) else 0
 
     return hole
 
@@ -1,30 +1,84 @@
+import atexit
 import csv
 import os
 import threading
+import time
+import weakref
 from typing import Dict, Iterable, Optional
 
+# loggers that are still open, so that exit paths bypassing atexit can flush them
+_open_loggers = weakref.WeakSet()
+
+
+def flush_open_loggers() -> None:
+	"""Write the pending rows of every open logger.
+
+	Meant for signal handlers that terminate the process without running atexit. A logger whose
+	lock is held by the interrupted frame is skipped rather than waited on.
+	"""
+	for progress_logger in list(_open_loggers):
+		progress_logger.flush(blocking=False)
+
 
 class CsvProgressLogger:
-	"""Append-only CSV writer for synthesis progress rows."""
+	"""Append-only CSV writer for synthesis progress rows.
+
+	By default every row is written through. With batch_size > 1, "interval" rows are buffered and
+	written once batch_size rows are pending or flush_interval seconds have passed since the last
+	write, whichever comes first. The thresholds are only checked when a row arrives, so all other
+	events are written through immediately together with any pending rows.
+	"""
 
-	def __init__(self, file_path: str, fieldnames: Iterable[str]):
+	def __init__(self, file_path: str, fieldnames: Iterable[str], batch_size: int = 1, flush_interval: float = 1.0):
 		self._file_path = file_path
-		self._fieldnames = list(fieldnames)
+		self._fieldnames = tuple(fieldnames)
+		self._batch_size = batch_size
+		self._flush_interval = flush_interval
+		self._pending = []
+		self._last_flush = time.monotonic()
 		self._lock = threading.Lock()
-		self._ensure_header()
-
-	def _ensure_header(self) -> None:
 		directory = os.path.dirname(self._file_path)
 		if directory:
 			os.makedirs(directory, exist_ok=True)
-		if not os.path.exists(self._file_path):
-			with open(self._file_path, "w", newline="", encoding="utf-8") as stream:
-				writer = csv.DictWriter(stream, fieldnames=self._fieldnames)
-				writer.writeheader()
+		self._stream = open(self._file_path, "a", newline="", encoding="utf-8")
+		# rows are stored as tuples in field order, which avoids the per-row dict handling of csv.DictWriter
+		self._writer = csv.writer(self._stream)
+		# in append mode the position starts at the end of the file, so the header is only written to an empty file
+		if self._stream.tell() == 0:
+			self._writer.writerow(self._fieldnames)
+			self._stream.flush()
+		atexit.register(self.close)
+		_open_loggers.add(self)
 
 	def write_row(self, row: Dict[str, Optional[object]]) -> None:
-		filtered = {key: row.get(key) for key in self._fieldnames}
+		filtered = tuple(row.get(key) for key in self._fieldnames)
+		with self._lock:
+			self._pending.append(filtered)
+			# only periodic rows may wait in the buffer; improvements and bounds are read back from the log
+			if (row.get("event") != "interval" or len(self._pending) >= self._batch_size
+					or time.monotonic() - self._last_flush >= self._flush_interval):
+				self._write_pending()
+
+	def _write_pending(self) -> None:
+		if self._pending:
+			self._writer.writerows(self._pending)
+			self._pending.clear()
+		self._stream.flush()
+		self._last_flush = time.monotonic()
+
+	def flush(self, blocking: bool = True) -> None:
+		if not self._lock.acquire(blocking):
+			return
+		try:
+			if not self._stream.closed:
+				self._write_pending()
+		finally:
+			self._lock.release()
+
+	def close(self) -> None:
 		with self._lock:
-			with open(self._file_path, "a", newline="", encoding="utf-8") as stream:
-				writer = csv.DictWriter(stream, fieldnames=self._fieldnames)
-				writer.writerow(filtered)
+			if not self._stream.closed:
+				self._write_pending()
+				self._stream.close()
+		atexit.unregister(self.close)
+		_open_loggers.discard(self)
@@ -10,38 +10,26 @@ Tests include:
 
 import sys
 import os
+import json
 import time
+import concurrent.futures
+import multiprocessing
 from pathlib import Path
 
+import pytest
+
 # Determine environment
 if os.path.exists('/opt/synthesis-modified'):
     project_root = Path('/opt')
 else:
     project_root = Path(__file__).parent.parent.parent
 
-sys.path.insert(0, str(project_root / "synthesis-modified"))
-
-import paynt.parser.sketch
-import paynt.synthesizer.synthesizer_ar as modified_synthesizer_ar
-import paynt.utils.timer
-
-ModifiedSynthesizerAR = modified_synthesizer_ar.SynthesizerAR
-modified_load_sketch = paynt.parser.sketch.Sketch.load_sketch
-
-# Clear and reload for original
-sys.path.remove(str(project_root / "synthesis-modified"))
-modules_to_remove = [key for key in sys.modules.keys() if key.startswith('paynt')]
-for module in modules_to_remove:
-    sys.modules.pop(module, None)
-
-sys.path.insert(0, str(project_root / "synthesis-original"))
-
-import paynt.parser.sketch as original_sketch
-import paynt.synthesizer.synthesizer_ar as original_synthesizer_ar
-
-OriginalSynthesizerAR = original_synthesizer_ar.SynthesizerAR
-original_load_sketch = original_sketch.Sketch.load_sketch
-
+# Each variant runs in its own worker process with its own copy of paynt on sys.path, so the two
+# packages are imported once per worker and never share sys.modules.
+VARIANT_DIRECTORIES = {
+    "Original": "synthesis-original",
+    "Modified": "synthesis-modified",
+}
 
 class SynthesisResult:
     def __init__(self, name, time_taken, found_solution, value=None, iterations=None):
@@ -52,11 +40,50 @@ class SynthesisResult:
         self.iterations = iterations
 
 
-def run_synthesis(synthesizer_class, load_sketch_fn, sketch_path, props_path, name):
-    """Run synthesis and return results."""
+def _init_worker(variant_directory):
+    """Put the variant on sys.path and import paynt once for the lifetime of the worker."""
+    sys.path.insert(0, str(project_root / variant_directory))
+    import paynt.parser.sketch
+    import paynt.synthesizer.synthesizer_ar
+    import paynt.utils.timer
+
+
+def start_workers():
+    """Create one worker per variant, the worker process itself is started on first use."""
+    # spawn instead of fork: the parent must not have imported stormpy or either paynt package
+    return {
+        variant: concurrent.futures.ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(variant_directory,),
+        )
+        for variant, variant_directory in VARIANT_DIRECTORIES.items()
+    }
+
+
+def shutdown_workers(workers):
+    for worker in workers.values():
+        worker.shutdown()
+
+
+@pytest.fixture(scope="session")
+def synthesis_workers():
+    """Workers shared by all tests of the session, so each variant is imported only once."""
+    workers = start_workers()
+    yield workers
+    shutdown_workers(workers)
+
+
+def _run_synthesis_in_worker(sketch_path, props_path, name):
+    """Run synthesis inside a worker process and return results."""
+    import paynt.parser.sketch
+    import paynt.synthesizer.synthesizer_ar
+    import paynt.utils.timer
+
     try:
         # Load quotient
-        quotient = load_sketch_fn(
+        quotient = paynt.parser.sketch.Sketch.load_sketch(
             sketch_path=str(sketch_path),
             properties_path=str(props_path),
             relative_error=0,
@@ -64,15 +91,13 @@ def run_synthesis(synthesizer_class, load_sketch_fn, sketch_path, props_path, na
         )
         
         # Create synthesizer
-        synthesizer = synthesizer_class(quotient)
+        synthesizer = paynt.synthesizer.synthesizer_ar.SynthesizerAR(quotient)
         
-        # Initialize timer
-        if paynt.utils.timer.GlobalTimer.global_timer is None:
-            paynt.utils.timer.GlobalTimer.start()
+        # Initialize timer, the synthesizer reads it and a worker is reused across runs
+        paynt.utils.timer.GlobalTimer.start()
         
         # Run synthesis
-        start_time = paynt.utils.timer.Timer()
-        start_time.start()
+        start_time = time.perf_counter_ns()
         
         assignment = synthesizer.synthesize(
             family=quotient.family,
@@ -80,7 +105,7 @@ def run_synthesis(synthesizer_class, load_sketch_fn, sketch_path, props_path, na
             print_stats=False
         )
         
-        elapsed = start_time.read()
+        elapsed = (time.perf_counter_ns() - start_time) / 1e9
         
         # Extract results
         found_solution = (assignment is not None and assignment is not False)
@@ -96,64 +121,109 @@ def run_synthesis(synthesizer_class, load_sketch_fn, sketch_path, props_path, na
         return SynthesisResult(name, 0, False)
 
 
-def test_basic_coin_model():
+_RESULT_ROW = "{method:<20} {time:<12.2f} {solution:<10} {value:<15} {iterations}"
+
+
+def _run_concurrently():
+    """Whether PAYNT_CONCURRENT_COMPARISON asks for the variants to run at the same time, which makes timings unreliable."""
+    return os.environ.get("PAYNT_CONCURRENT_COMPARISON", "") not in ("", "0")
+
+
+def _format_results(orig_result, mod_result):
+    """Return the lines of the results table comparing the original and the modified run."""
+    lines = [
+        "\n" + "-"*80,
+        "RESULTS:",
+        "-"*80,
+        f"{'Method':<20} {'Time (s)':<12} {'Solution':<10} {'Value':<15} {'Iterations'}",
+        "-"*80,
+    ]
+    for method, result in [("Original (Stack)", orig_result), ("Modified (PQueue)", mod_result)]:
+        lines.append(_RESULT_ROW.format(
+            method=method, time=result.time_taken, solution=str(result.found_solution),
+            value=str(result.value), iterations=result.iterations
+        ))
+    lines.append("-"*80)
+    if _run_concurrently():
+        lines.append("Note: both variants ran concurrently and shared the CPU, the times are not comparable")
+    return lines
+
+
+def _log_results(sketch_path, props_path, results):
+    """Append the results as JSON lines to the file given by PAYNT_RESULTS_JSONL, if set."""
+    results_path = os.environ.get("PAYNT_RESULTS_JSONL")
+    if not results_path:
+        return
+    records = [
+        json.dumps({
+            "sketch": str(sketch_path), "props": str(props_path), "name": result.name, "time": result.time_taken,
+            "found_solution": result.found_solution, "value": result.value, "iterations": result.iterations,
+        }, default=str)
+        for result in results
+    ]
+    with open(results_path, "a", encoding="utf-8") as file:
+        file.write("\n".join(records) + "\n")
+
+
+def _missing_files(*paths):
+    return [str(path) for path in paths if not path.is_file()]
+
+
+def _submit_synthesis(workers, variant, sketch_path, props_path, name):
+    return workers[variant].submit(_run_synthesis_in_worker, str(sketch_path), str(props_path), name)
+
+
+def run_synthesis_pair(workers, sketch_path, props_path):
+    """
+    Run the original and the modified variant and return both results. The variants run one after the other, so that
+    their times can be compared, unless PAYNT_CONCURRENT_COMPARISON is set.
+    """
+    if _run_concurrently():
+        orig_future = _submit_synthesis(workers, "Original", sketch_path, props_path, "Original")
+        mod_future = _submit_synthesis(workers, "Modified", sketch_path, props_path, "Modified")
+        orig_result, mod_result = orig_future.result(), mod_future.result()
+    else:
+        orig_result = _submit_synthesis(workers, "Original", sketch_path, props_path, "Original").result()
+        mod_result = _submit_synthesis(workers, "Modified", sketch_path, props_path, "Modified").result()
+    _log_results(sketch_path, props_path, [orig_result, mod_result])
+    return orig_result, mod_result
+
+
+def test_basic_coin_model(synthesis_workers):
     """
     Test 1: Basic Coin Model
     - Simple model with 6 holes, family size ~1000
     - Both should find solution easily
     - Validates basic functionality
     """
-    print("\n" + "="*80)
-    print("TEST 1: Basic Coin Model (6 holes)")
-    print("="*80)
-    print("Expected: Both explore design space and complete successfully")
-    print("Note: This model may have strict constraints - we validate exploration, not necessarily finding solution")
+    # output is collected and printed in a few blocks instead of one print per line
+    lines = [
+        "\n" + "="*80,
+        "TEST 1: Basic Coin Model (6 holes)",
+        "="*80,
+        "Expected: Both explore design space and complete successfully",
+        "Note: This model may have strict constraints - we validate exploration, not necessarily finding solution",
+    ]
     
     models_dir = project_root / "synthesis-modified" / "models" / "dtmc" / "coin"
     sketch_path = models_dir / "sketch.templ"
     props_path = models_dir / "sketch.props"
     
-    if not sketch_path.exists() or not props_path.exists():
-        print(f"⚠️  Model files not found, skipping test")
-        return
-    
-    print(f"\nModel: {sketch_path}")
-    print(f"Props: {props_path}")
+    missing_files = _missing_files(sketch_path, props_path)
+    if missing_files:
+        pytest.skip(f"model files not found: {', '.join(missing_files)}")
     
-    # Run original
-    print("\n[1/2] Running ORIGINAL (Stack-based DFS)...")
-    orig_result = run_synthesis(
-        OriginalSynthesizerAR, 
-        original_load_sketch,
-        sketch_path, 
-        props_path,
-        "Original"
-    )
+    lines.append(f"\nModel: {sketch_path}")
+    lines.append(f"Props: {props_path}")
     
-    # Reset timer for next run
-    paynt.utils.timer.GlobalTimer.global_timer = None
-    
-    # Run modified
-    print("[2/2] Running MODIFIED (Priority Queue)...")
-    mod_result = run_synthesis(
-        ModifiedSynthesizerAR,
-        modified_load_sketch,
-        sketch_path,
-        props_path,
-        "Modified"
-    )
+    # Run original and modified, see run_synthesis_pair
+    lines.append("\nRunning ORIGINAL (Stack-based DFS) and MODIFIED (Priority Queue)...")
+    print("\n".join(lines))
+    orig_result, mod_result = run_synthesis_pair(synthesis_workers, sketch_path, props_path)
     
     # Compare results
-    print("\n" + "-"*80)
-    print("RESULTS:")
-    print("-"*80)
-    print(f"{'Method':<20} {'Time (s)':<12} {'Solution':<10} {'Value':<15} {'Iterations'}")
-    print("-"*80)
-    print(f"{'Original (Stack)':<20} {orig_result.time_taken:<12.2f} {str(orig_result.found_solution):<10} "
-          f"{str(orig_result.value):<15} {orig_result.iterations}")
-    print(f"{'Modified (PQueue)':<20} {mod_result.time_taken:<12.2f} {str(mod_result.found_solution):<10} "
-          f"{str(mod_result.value):<15} {mod_result.iterations}")
-    print("-"*80)
+    lines = _format_results(orig_result, mod_result)
+    print("\n".join(lines))
     
     # Assertions - both should complete (solution may or may not exist)
     # The key is that both algorithms should agree
@@ -161,16 +231,14 @@ def test_basic_coin_model():
         "Both algorithms should agree on whether solution exists"
     
     if orig_result.found_solution and mod_result.found_solution:
-        print("✅ TEST 1 PASSED: Both algorithms found solutions and agree")
         if orig_result.value is not None and mod_result.value is not None:
             assert abs(orig_result.value - mod_result.value) < 0.01, "Both should find same optimal value"
+        print("✅ TEST 1 PASSED: Both algorithms found solutions and agree\n")
     else:
-        print("✅ TEST 1 PASSED: Both algorithms agree no solution exists (constraints may be too strict)")
-    
-    print("")
+        print("✅ TEST 1 PASSED: Both algorithms agree no solution exists (constraints may be too strict)\n")
 
 
-def test_maze_model_shallow_tree():
+def test_maze_model_shallow_tree(synthesis_workers):
     """
     Test 2: Maze Model - Shallow Tree Test
     - Medium complexity (24 holes)
@@ -178,73 +246,49 @@ def test_maze_model_shallow_tree():
     - Priority queue should excel: best-first finds optimal faster
     - Expected: Modified finds solution faster or with fewer iterations
     """
-    print("\n" + "="*80)
-    print("TEST 2: Maze Model - Priority Queue Advantage")
-    print("="*80)
-    print("Expected: Priority queue finds optimal solution faster (best-first search)")
+    lines = [
+        "\n" + "="*80,
+        "TEST 2: Maze Model - Priority Queue Advantage",
+        "="*80,
+        "Expected: Priority queue finds optimal solution faster (best-first search)",
+    ]
     
     models_dir = project_root / "synthesis-modified" / "models" / "dtmc" / "maze" / "concise"
     sketch_path = models_dir / "sketch.templ"
     props_path = models_dir / "sketch.props"
     
-    if not sketch_path.exists() or not props_path.exists():
-        print(f"⚠️  Model files not found, skipping test")
-        return
-    
-    print(f"\nModel: {sketch_path}")
-    print(f"Props: {props_path}")
-    
-    # Run original
-    print("\n[1/2] Running ORIGINAL (Stack-based DFS)...")
-    orig_result = run_synthesis(
-        OriginalSynthesizerAR,
-        original_load_sketch,
-        sketch_path,
-        props_path,
-        "Original"
-    )
+    missing_files = _missing_files(sketch_path, props_path)
+    if missing_files:
+        pytest.skip(f"model files not found: {', '.join(missing_files)}")
     
-    # Reset timer for next run
-    paynt.utils.timer.GlobalTimer.global_timer = None
+    lines.append(f"\nModel: {sketch_path}")
+    lines.append(f"Props: {props_path}")
     
-    # Run modified
-    print("[2/2] Running MODIFIED (Priority Queue)...")
-    mod_result = run_synthesis(
-        ModifiedSynthesizerAR,
-        modified_load_sketch,
-        sketch_path,
-        props_path,
-        "Modified"
-    )
+    # Run original and modified, see run_synthesis_pair
+    lines.append("\nRunning ORIGINAL (Stack-based DFS) and MODIFIED (Priority Queue)...")
+    print("\n".join(lines))
+    orig_result, mod_result = run_synthesis_pair(synthesis_workers, sketch_path, props_path)
     
     # Compare results
-    print("\n" + "-"*80)
-    print("RESULTS:")
-    print("-"*80)
-    print(f"{'Method':<20} {'Time (s)':<12} {'Solution':<10} {'Value':<15} {'Iterations'}")
-    print("-"*80)
-    print(f"{'Original (Stack)':<20} {orig_result.time_taken:<12.2f} {str(orig_result.found_solution):<10} "
-          f"{str(orig_result.value):<15} {orig_result.iterations}")
-    print(f"{'Modified (PQueue)':<20} {mod_result.time_taken:<12.2f} {str(mod_result.found_solution):<10} "
-          f"{str(mod_result.value):<15} {mod_result.iterations}")
-    print("-"*80)
+    lines = _format_results(orig_result, mod_result)
     
     # Analysis
     if orig_result.found_solution and mod_result.found_solution:
-        print("\n✅ Both found solutions!")
+        lines.append("\n✅ Both found solutions!")
         if mod_result.iterations and orig_result.iterations:
             speedup = orig_result.iterations / mod_result.iterations
-            print(f"📊 Iteration ratio: {speedup:.2f}x")
+            lines.append(f"📊 Iteration ratio: {speedup:.2f}x")
             if speedup > 1.1:
-                print(f"✅ Priority queue explored {speedup:.1f}x fewer families!")
+                lines.append(f"✅ Priority queue explored {speedup:.1f}x fewer families!")
             elif speedup < 0.9:
-                print(f"⚠️  Stack DFS was more efficient ({1/speedup:.1f}x)")
+                lines.append(f"⚠️  Stack DFS was more efficient ({1/speedup:.1f}x)")
             else:
-                print(f"≈ Similar exploration efficiency")
+                lines.append(f"≈ Similar exploration efficiency")
     elif orig_result.found_solution or mod_result.found_solution:
-        print("\n⚠️  Only one algorithm found solution - possible bug!")
+        lines.append("\n⚠️  Only one algorithm found solution - possible bug!")
     else:
-        print("\n⚠️  Neither found solution - constraints may be too strict")
+        lines.append("\n⚠️  Neither found solution - constraints may be too strict")
+    print("\n".join(lines))
     
     # Assertions
     assert orig_result.found_solution == mod_result.found_solution, \
@@ -254,69 +298,43 @@ def test_maze_model_shallow_tree():
         if orig_result.value is not None and mod_result.value is not None:
             assert abs(orig_result.value - mod_result.value) < 0.01, \
                 "Both should find same optimal value"
-        print("✅ TEST 2 PASSED: Both found solutions with same optimal value")
+        print("✅ TEST 2 PASSED: Both found solutions with same optimal value\n")
     else:
-        print("✅ TEST 2 PASSED: Both agree on result")
-    
-    print("")
+        print("✅ TEST 2 PASSED: Both agree on result\n")
 
 
-def test_grid_model_satisfiability():
+def test_grid_model_satisfiability(synthesis_workers):
     """
     Test 3: Grid Model - Satisfiability Check
     - Tests reachability property (easier than optimization)
     - Both should handle this correctly
     """
-    print("\n" + "="*80)
-    print("TEST 3: Grid Model - Reachability Property")
-    print("="*80)
-    print("Expected: Both correctly determine satisfiability")
+    lines = [
+        "\n" + "="*80,
+        "TEST 3: Grid Model - Reachability Property",
+        "="*80,
+        "Expected: Both correctly determine satisfiability",
+    ]
     
     models_dir = project_root / "synthesis-modified" / "models" / "dtmc" / "grid" / "grid"
     sketch_path = models_dir / "sketch.templ"
     props_path = models_dir / "easy.props"  # Use easy.props (reachability)
     
-    if not sketch_path.exists() or not props_path.exists():
-        print(f"⚠️  Model files not found, skipping test")
-        return
-    
-    print(f"\nModel: {sketch_path}")
-    print(f"Props: {props_path}")
-    
-    # Run original
-    print("\n[1/2] Running ORIGINAL (Stack-based DFS)...")
-    orig_result = run_synthesis(
-        OriginalSynthesizerAR,
-        original_load_sketch,
-        sketch_path,
-        props_path,
-        "Original"
-    )
+    missing_files = _missing_files(sketch_path, props_path)
+    if missing_files:
+        pytest.skip(f"model files not found: {', '.join(missing_files)}")
     
-    # Reset timer for next run
-    paynt.utils.timer.GlobalTimer.global_timer = None
+    lines.append(f"\nModel: {sketch_path}")
+    lines.append(f"Props: {props_path}")
     
-    # Run modified
-    print("[2/2] Running MODIFIED (Priority Queue)...")
-    mod_result = run_synthesis(
-        ModifiedSynthesizerAR,
-        modified_load_sketch,
-        sketch_path,
-        props_path,
-        "Modified"
-    )
+    # Run original and modified, see run_synthesis_pair
+    lines.append("\nRunning ORIGINAL (Stack-based DFS) and MODIFIED (Priority Queue)...")
+    print("\n".join(lines))
+    orig_result, mod_result = run_synthesis_pair(synthesis_workers, sketch_path, props_path)
     
     # Compare results
-    print("\n" + "-"*80)
-    print("RESULTS:")
-    print("-"*80)
-    print(f"{'Method':<20} {'Time (s)':<12} {'Solution':<10} {'Value':<15} {'Iterations'}")
-    print("-"*80)
-    print(f"{'Original (Stack)':<20} {orig_result.time_taken:<12.2f} {str(orig_result.found_solution):<10} "
-          f"{str(orig_result.value):<15} {orig_result.iterations}")
-    print(f"{'Modified (PQueue)':<20} {mod_result.time_taken:<12.2f} {str(mod_result.found_solution):<10} "
-          f"{str(mod_result.value):<15} {mod_result.iterations}")
-    print("-"*80)
+    lines = _format_results(orig_result, mod_result)
+    print("\n".join(lines))
     
     # Assertions - both should agree on satisfiability
     assert orig_result.found_solution == mod_result.found_solution, \
@@ -330,27 +348,34 @@ def test_performance_summary():
     Test 4: Summary and Performance Analysis
     - Runs all three tests and provides overall summary
     """
-    print("\n" + "="*80)
-    print("COMPREHENSIVE TEST SUITE - SUMMARY")
-    print("="*80)
-    
-    print("\n✅ All tests completed successfully!")
-    print("\nKey Findings:")
-    print("  1. Both algorithms correctly agree on satisfiability/feasibility")
-    print("  2. When solutions exist, both find the same optimal values")
-    print("  3. Priority queue implementation is correct and functional")
-    print("  4. Both algorithms explore design space systematically")
-    print("\nNote:")
-    print("  - Some models have very strict constraints and may not have solutions")
-    print("  - This is expected behavior - the algorithms correctly identify infeasibility")
-    print("  - The key validation is that both algorithms AGREE on the results")
-    
-    print("\n" + "="*80 + "\n")
+    lines = [
+        "\n" + "="*80,
+        "COMPREHENSIVE TEST SUITE - SUMMARY",
+        "="*80,
+        "\n✅ All tests completed successfully!",
+        "\nKey Findings:",
+        "  1. Both algorithms correctly agree on satisfiability/feasibility",
+        "  2. When solutions exist, both find the same optimal values",
+        "  3. Priority queue implementation is correct and functional",
+        "  4. Both algorithms explore design space systematically",
+        "\nNote:",
+        "  - Some models have very strict constraints and may not have solutions",
+        "  - This is expected behavior - the algorithms correctly identify infeasibility",
+        "  - The key validation is that both algorithms AGREE on the results",
+        "\n" + "="*80 + "\n",
+    ]
+    print("\n".join(lines))
 
 
 if __name__ == "__main__":
     # Run all tests
-    test_basic_coin_model()
-    test_maze_model_shallow_tree()
-    test_grid_model_satisfiability()
-    test_performance_summary()
+    workers = start_workers()
+    try:
+        for test in [test_basic_coin_model, test_maze_model_shallow_tree, test_grid_model_satisfiability]:
+            try:
+                test(workers)
+            except pytest.skip.Exception as skipped:
+                print(f"⚠️  {test.__name__} skipped: {skipped.msg}")
+        test_performance_summary()
+    finally:
+        shutdown_workers(workers)
@@ -0,0 +1,99 @@
+import csv
+
+from paynt.utils.progress_logger import CsvProgressLogger, flush_open_loggers
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as stream:
+        return list(csv.DictReader(stream))
+
+
+class TestCsvProgressLogger:
+
+    def test_rows_are_written_after_header(self, tmp_path):
+        # setup
+        path = tmp_path / "progress" / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["timestamp", "best_value"])
+
+        # test
+        progress_logger.write_row({"timestamp": 0.5, "best_value": 1, "ignored": "x"})
+        progress_logger.write_row({"timestamp": 1.0})
+        progress_logger.close()
+
+        # assert
+        rows = read_rows(path)
+        assert rows == [
+            {"timestamp": "0.5", "best_value": "1"},
+            {"timestamp": "1.0", "best_value": ""},
+        ]
+
+    def test_existing_file_is_appended(self, tmp_path):
+        path = tmp_path / "log.csv"
+        first = CsvProgressLogger(str(path), ["event"])
+        first.write_row({"event": "start"})
+        first.close()
+
+        second = CsvProgressLogger(str(path), ["event"])
+        second.write_row({"event": "finished"})
+        second.close()
+
+        assert [row["event"] for row in read_rows(path)] == ["start", "finished"]
+
+    def test_close_is_idempotent(self, tmp_path):
+        progress_logger = CsvProgressLogger(str(tmp_path / "log.csv"), ["event"])
+        progress_logger.close()
+        progress_logger.close()
+
+    def test_rows_are_written_through_by_default(self, tmp_path):
+        path = tmp_path / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["event"])
+        progress_logger.write_row({"event": "interval"})
+        assert len(read_rows(path)) == 1
+        progress_logger.close()
+
+    def test_interval_rows_are_batched(self, tmp_path):
+        path = tmp_path / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["event"], batch_size=2, flush_interval=3600)
+
+        progress_logger.write_row({"event": "interval"})
+        assert read_rows(path) == []
+        progress_logger.write_row({"event": "interval"})
+        assert len(read_rows(path)) == 2
+
+        progress_logger.write_row({"event": "interval"})
+        progress_logger.flush()
+        assert len(read_rows(path)) == 3
+        progress_logger.close()
+
+    def test_other_events_are_written_through(self, tmp_path):
+        path = tmp_path / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["event"], batch_size=1000, flush_interval=3600)
+
+        progress_logger.write_row({"event": "interval"})
+        progress_logger.write_row({"event": "improvement"})
+        assert [row["event"] for row in read_rows(path)] == ["interval", "improvement"]
+        progress_logger.close()
+
+    def test_interval_rows_are_flushed_after_interval(self, tmp_path):
+        path = tmp_path / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["event"], batch_size=1000, flush_interval=0)
+        progress_logger.write_row({"event": "interval"})
+        assert len(read_rows(path)) == 1
+        progress_logger.close()
+
+    def test_open_loggers_are_flushed(self, tmp_path):
+        path = tmp_path / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["event"], batch_size=1000, flush_interval=3600)
+        progress_logger.write_row({"event": "interval"})
+        assert read_rows(path) == []
+
+        flush_open_loggers()
+        assert len(read_rows(path)) == 1
+        progress_logger.close()
+
+    def test_values_are_quoted(self, tmp_path):
+        path = tmp_path / "log.csv"
+        progress_logger = CsvProgressLogger(str(path), ["event", "best_value"])
+        progress_logger.write_row({"event": 'split "x", y\nz', "best_value": None})
+        progress_logger.close()
+        assert read_rows(path) == [{"event": 'split "x", y\nz', "best_value": ""}]
@@ -0,0 +1,47 @@
+import paynt.utils.tree_helper
+
+
+def leaf(label):
+    return {"split": None, "actual_label": label}
+
+def inner(var, bound, child_true, child_false):
+    child_true["edge_label"] = "true"
+    child_false["edge_label"] = "false"
+    return {
+        "split": {"lhs": {"var": var}, "rhs": bound},
+        "additional_splits": [],
+        "children": [child_true, child_false],
+    }
+
+
+class TestTreeHelper:
+
+    def test_build_tree_helper_preorder(self):
+        # setup
+        tree_json = inner("x", 1.5, inner("y", 0.5, leaf(["a"]), leaf(["b"])), leaf(["c"]))
+
+        # test
+        helper = paynt.utils.tree_helper.build_tree_helper(tree_json)
+
+        # assert
+        assert [node["id"] for node in helper] == [0, 1, 2, 3, 4]
+        assert helper[0]["chosen"] == ("x", 1)
+        assert helper[0]["children"] == [1, 4]
+        assert helper[1]["children"] == [2, 3]
+        assert [node["parent"] for node in helper] == [None, 0, 1, 1, 0]
+        assert [node["chosen"] for node in helper if node["leaf"]] == [["a"], ["b"], ["c"]]
+
+    def test_build_tree_helper_does_not_share_default(self):
+        tree_json = inner("x", 0, leaf(["a"]), leaf(["b"]))
+        first = paynt.utils.tree_helper.build_tree_helper(tree_json)
+        second = paynt.utils.tree_helper.build_tree_helper(tree_json)
+        assert len(first) == len(second) == 3
+
+    def test_build_tree_helper_deep_tree(self):
+        # deeper than the default recursion limit
+        depth = 2000
+        tree_json = leaf(["a"])
+        for _ in range(depth):
+            tree_json = inner("x", 0, leaf(["b"]), tree_json)
+        helper = paynt.utils.tree_helper.build_tree_helper(tree_json)
+        assert len(helper) == 2*depth+1